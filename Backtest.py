@@ -0,0 +1,269 @@
+# Backtest.py
+# Score rating models against past matches with log-loss, Brier score and calibration.
+#
+#   python Backtest.py player.history --k 16 24 32 40 --scale 300 400 500
+
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import shared_memory
+
+import numpy as np
+
+EPSILON = 1e-12
+
+
+class Elo:
+    """The model in Methods.calculate_elo with its constants exposed."""
+
+    def __init__(self, k=32, scale=400, rounding=True, initial=1000):
+        self.k = k
+        self.scale = scale
+        self.rounding = rounding
+        self.initial = initial
+
+    def __repr__(self):
+        return f"Elo(k={self.k}, scale={self.scale}, rounding={self.rounding})"
+
+    def k_factor(self, games):
+        return self.k
+
+    def predict(self, winners, losers, scores, initial):
+        """Expected score of the first player of each game, rating as we go."""
+        ratings = initial.tolist()
+        games = [0] * len(ratings)
+        predictions = []
+        for a, b, score in zip(winners.tolist(), losers.tolist(), scores.tolist()):
+            rating_a, rating_b = ratings[a], ratings[b]
+            expected = 1 / (1 + 10 ** ((rating_b - rating_a) / self.scale))
+            predictions.append(expected)
+            new_a = rating_a + self.k_factor(games[a]) * (score - expected)
+            new_b = rating_b + self.k_factor(games[b]) * ((1 - score) - (1 - expected))
+            if self.rounding:
+                new_a, new_b = round(new_a), round(new_b)
+            ratings[a], ratings[b] = new_a, new_b
+            games[a] += 1
+            games[b] += 1
+        return np.array(predictions)
+
+
+class DecayingElo(Elo):
+    """Elo whose K shrinks with games played: k / (1 + games / decay), never below k_min."""
+
+    def __init__(self, k=40, k_min=10, decay=30, scale=400, rounding=True, initial=1000):
+        super().__init__(k, scale, rounding, initial)
+        self.k_min = k_min
+        self.decay = decay
+
+    def __repr__(self):
+        return f"DecayingElo(k={self.k}, k_min={self.k_min}, decay={self.decay}, scale={self.scale})"
+
+    def k_factor(self, games):
+        return max(self.k_min, self.k / (1 + games / self.decay))
+
+
+class Glicko:
+    """Glicko-1 with every game treated as its own rating period.
+
+    rd is the starting rating deviation and c how much deviation comes back
+    per game, so long-idle and new players move faster.
+    """
+
+    q = math.log(10) / 400
+
+    def __init__(self, rd=350, c=35, rd_min=30, initial=1000):
+        self.rd = rd
+        self.c = c
+        self.rd_min = rd_min
+        self.initial = initial
+
+    def __repr__(self):
+        return f"Glicko(rd={self.rd}, c={self.c}, rd_min={self.rd_min})"
+
+    def g(self, rd):
+        return 1 / math.sqrt(1 + 3 * self.q ** 2 * rd ** 2 / math.pi ** 2)
+
+    def _update(self, rating, rd, opponent, opponent_rd, score):
+        g = self.g(opponent_rd)
+        expected = 1 / (1 + 10 ** (-g * (rating - opponent) / 400))
+        d2 = 1 / (self.q ** 2 * g ** 2 * expected * (1 - expected))
+        denominator = 1 / rd ** 2 + 1 / d2
+        return rating + self.q / denominator * g * (score - expected), max(self.rd_min, math.sqrt(1 / denominator))
+
+    def predict(self, winners, losers, scores, initial):
+        ratings = initial.tolist()
+        deviations = [self.rd] * len(ratings)
+        predictions = []
+        for a, b, score in zip(winners.tolist(), losers.tolist(), scores.tolist()):
+            rd_a = min(self.rd, math.sqrt(deviations[a] ** 2 + self.c ** 2))
+            rd_b = min(self.rd, math.sqrt(deviations[b] ** 2 + self.c ** 2))
+            g = self.g(math.sqrt(rd_a ** 2 + rd_b ** 2))
+            predictions.append(1 / (1 + 10 ** (-g * (ratings[a] - ratings[b]) / 400)))
+            ratings[a], deviations[a], ratings[b], deviations[b] = (
+                *self._update(ratings[a], rd_a, ratings[b], rd_b, score),
+                *self._update(ratings[b], rd_b, ratings[a], rd_a, 1 - score))
+        return np.array(predictions)
+
+
+def grid(model, **params):
+    """One model per combination of the given parameter lists."""
+    names = list(params)
+    return [model(**dict(zip(names, values))) for values in product(*params.values())]
+
+
+def metrics(predictions, scores, bins=10):
+    p = np.clip(predictions, EPSILON, 1 - EPSILON)
+    log_loss = float(-np.mean(scores * np.log(p) + (1 - scores) * np.log(1 - p)))
+    brier = float(np.mean((p - scores) ** 2))
+    # Games are listed winner first, so bin each game from both sides or the
+    # observed rate in every bin would just be the win rate of the first slot
+    p, scores = np.concatenate([p, 1 - p]), np.concatenate([scores, 1 - scores])
+    which = np.minimum((p * bins).astype(int), bins - 1)
+    calibration = []
+    for i in range(bins):
+        mask = which == i
+        if mask.any():
+            calibration.append((i / bins, float(p[mask].mean()), float(scores[mask].mean()), int(mask.sum())))
+    return {'log_loss': log_loss, 'brier': brier, 'calibration': calibration}
+
+
+def load_history(filename):
+    """Games from a History file or a winner,loser[,score] CSV as arrays.
+
+    Returns (first players, second players, scores for the first player,
+    starting ratings, player names). Score is 1 for a win and 0.5 for a
+    draw; starting ratings are NaN where unknown (always, for a CSV).
+    The file is only read, and a file without games is a ValueError.
+    """
+    if filename.lower().endswith('.csv'):
+        import csv
+
+        with open(filename, 'r', encoding='utf-8', newline='') as file:
+            rows = [row for row in csv.reader(file) if row]
+        if rows and rows[0][0].strip().lower() == 'winner':
+            rows = rows[1:]
+        ids = {}
+        names = []
+        for row in rows:
+            for name in row[:2]:
+                if name.strip().lower() not in ids:
+                    ids[name.strip().lower()] = len(names)
+                    names.append(name.strip())
+        winners = np.array([ids[row[0].strip().lower()] for row in rows], dtype=np.int64)
+        losers = np.array([ids[row[1].strip().lower()] for row in rows], dtype=np.int64)
+        scores = np.array([float(row[2]) if len(row) > 2 else 1.0 for row in rows])
+        initial = np.full(len(names), np.nan)
+    else:
+        # Read-only: History.load would open the file for appending and cut off a torn tail
+        import Journal
+
+        ids = {}  # case-folded name -> player id, assigned the way History does
+        names = []
+        first_ratings = {}
+        winners, losers = [], []
+        for _, (kind, _, record_names, values) in Journal.read_records(filename):
+            if kind == Journal.MATCH:
+                pair = []
+                for name, old in zip(record_names, values[::2]):  # winner old, loser old
+                    if name.lower() not in ids:
+                        ids[name.lower()] = len(names)
+                        names.append(name)
+                    pair.append(ids[name.lower()])
+                    first_ratings.setdefault(pair[-1], old)
+                winners.append(pair[0])
+                losers.append(pair[1])
+            elif kind == Journal.RENAME:
+                player = ids.pop(record_names[0].lower(), None)
+                if player is not None:
+                    ids[record_names[1].lower()] = player
+                    names[player] = record_names[1]
+            elif kind == Journal.DELETE:
+                ids.pop(record_names[0].lower(), None)
+        winners = np.array(winners, dtype=np.int64)
+        losers = np.array(losers, dtype=np.int64)
+        scores = np.ones(len(winners))
+        initial = np.array([first_ratings.get(player, np.nan) for player in range(len(names))])
+
+    if not len(winners):
+        raise ValueError(f"{filename} has no games")
+    return winners, losers, scores, initial, names
+
+
+# Arrays for the worker processes, attached once per process by _attach
+_shared = {}
+
+
+def _attach(name, games, players):
+    block = shared_memory.SharedMemory(name=name)
+    _shared['block'] = block  # keep the mapping alive
+    offset = 0
+    for key, dtype, count in (('winners', np.int64, games), ('losers', np.int64, games),
+                              ('scores', np.float64, games), ('initial', np.float64, players)):
+        _shared[key] = np.ndarray((count,), dtype=dtype, buffer=block.buf, offset=offset)
+        offset += count * np.dtype(dtype).itemsize
+
+
+def _evaluate(model):
+    initial = np.where(np.isnan(_shared['initial']), model.initial, _shared['initial'])
+    predictions = model.predict(_shared['winners'], _shared['losers'], _shared['scores'], initial)
+    return model, metrics(predictions, _shared['scores'])
+
+
+def sweep(winners, losers, scores, initial, models, workers=None):
+    """Evaluate every model in parallel; returns [(model, metrics)] best log-loss first.
+
+    The games are copied once into shared memory and every worker process
+    maps the same block instead of receiving its own pickled copy.
+    """
+    games, players = len(winners), len(initial)
+    arrays = (winners.astype(np.int64), losers.astype(np.int64), scores.astype(np.float64),
+              initial.astype(np.float64))
+    block = shared_memory.SharedMemory(create=True, size=max(1, sum(array.nbytes for array in arrays)))
+    try:
+        offset = 0
+        for array in arrays:
+            block.buf[offset:offset + array.nbytes] = array.tobytes()
+            offset += array.nbytes
+        with ProcessPoolExecutor(workers, initializer=_attach, initargs=(block.name, games, players)) as pool:
+            results = list(pool.map(_evaluate, models))
+    finally:
+        block.close()
+        block.unlink()
+    return sorted(results, key=lambda result: result[1]['log_loss'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest rating models on past matches.")
+    parser.add_argument('history', help="History file (see History.py) or winner,loser[,score] CSV")
+    parser.add_argument('--k', type=float, nargs='+', default=[32])
+    parser.add_argument('--scale', type=float, nargs='+', default=[400])
+    parser.add_argument('--no-rounding', action='store_true')
+    parser.add_argument('--decay', type=float, nargs='*', default=[], help="also try DecayingElo with these decays")
+    parser.add_argument('--glicko', action='store_true', help="also try Glicko")
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    try:
+        winners, losers, scores, initial, names = load_history(args.history)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    models = grid(Elo, k=args.k, scale=args.scale, rounding=[not args.no_rounding])
+    if args.decay:
+        models += grid(DecayingElo, k=args.k, decay=args.decay, scale=args.scale)
+    if args.glicko:
+        models.append(Glicko())
+
+    print(f"{len(winners)} games, {len(names)} players, {len(models)} models")
+    results = sweep(winners, losers, scores, initial, models, args.workers)
+    for model, result in results:
+        print(f"{result['log_loss']:.5f} log-loss  {result['brier']:.5f} Brier  {model}")
+
+    model, result = results[0]
+    print(f"\nCalibration of {model}:")
+    for low, predicted, observed, count in result['calibration']:
+        print(f"  p >= {low:.1f}: predicted {predicted:.3f}, observed {observed:.3f} ({count} sides)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Batch.py
+# Bulk match ingestion over a compact array of ratings instead of Player objects.
+
+import csv
+
+import numpy as np
+
+from Methods import elo_update
+
+
+def load_results_csv(filename):
+    """Read winner,loser name pairs from a CSV file (header row optional)."""
+    with open(filename, 'r', encoding='utf-8', newline='') as file:
+        rows = [row for row in csv.reader(file) if row]
+    if rows and [cell.strip().lower() for cell in rows[0][:2]] == ['winner', 'loser']:
+        rows = rows[1:]
+    return [(row[0].strip(), row[1].strip()) for row in rows]
+
+
+def sequential(ratings, winners, losers, k=32, games=None):
+    """Apply matches one after another with Methods.elo_update, as calculate_elo does.
+
+    If games is a list, (winner, loser, winner old, winner new, loser old,
+    loser new) is appended to it for every game.
+    """
+    ratings = ratings.tolist()
+    for w, l in zip(winners.tolist(), losers.tolist()):
+        winner_elo = ratings[w]
+        loser_elo = ratings[l]
+        ratings[w], ratings[l] = elo_update(winner_elo, loser_elo, k)
+        if games is not None:
+            games.append((w, l, winner_elo, ratings[w], loser_elo, ratings[l]))
+    return np.array(ratings, dtype=np.int64)
+
+
+def rating_period(ratings, winners, losers, k=32):
+    """Apply every match at once against the ratings from the start of the period."""
+    start = ratings.astype(np.float64)
+    diff = (start[losers] - start[winners]) / 400
+    expected_winner = 1 / (1 + 10 ** diff)
+    expected_loser = 1 / (1 + 10 ** -diff)
+
+    delta = np.zeros_like(start)
+    np.add.at(delta, winners, k * (1 - expected_winner))
+    np.add.at(delta, losers, k * (0 - expected_loser))
+    return np.rint(start + delta).astype(np.int64)
+
+
+def record_matches(players, winners, losers, k=32, simultaneous=False, games=None):
+    """Rate a batch of games between players[winners[i]] and players[losers[i]].
+
+    Only the players that take part are read, so a small batch costs the
+    same however long players is. Returns (indexes, old, new) arrays: the
+    positions in players of those players and their ratings before and
+    after the batch; nothing is written back to the Player objects. games
+    is filled as by sequential, with positions in players, and ignored for
+    a rating period.
+    """
+    winners = np.asarray(winners, dtype=np.intp)
+    losers = np.asarray(losers, dtype=np.intp)
+    if winners.shape != losers.shape:
+        raise ValueError(f"{len(winners)} winners but {len(losers)} losers")
+    for label, indexes in (("winner", winners), ("loser", losers)):
+        # numpy would wrap negative indexes round to the end of the roster
+        if len(indexes) and (indexes.min() < 0 or indexes.max() >= len(players)):
+            raise ValueError(f"{label} index out of range for {len(players)} players")
+    if (winners == losers).any():
+        # sequential and rating_period would rate a self-match differently
+        raise ValueError(f"player {int(winners[winners == losers][0])} is both winner and loser of a game")
+
+    # Re-index the games onto just the players in them
+    indexes, compact = np.unique(np.concatenate((winners, losers)), return_inverse=True)
+    winners, losers = compact[:len(winners)], compact[len(winners):]
+    old = np.fromiter((players[i].get_elo() for i in indexes.tolist()), dtype=np.int64, count=len(indexes))
+    if simultaneous:
+        return indexes, old, rating_period(old, winners, losers, k)
+    played = None if games is None else []
+    new = sequential(old, winners, losers, k, played)
+    if games is not None:
+        positions = indexes.tolist()
+        games.extend((positions[w], positions[l], *ratings) for w, l, *ratings in played)
+    return indexes, old, new
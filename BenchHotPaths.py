@@ -0,0 +1,130 @@
+# BenchHotPaths.py
+# pytest-benchmark suite for the hot paths in Methods and Player.
+# Not collected by a plain `pytest` run; run it explicitly:
+#
+#   pytest BenchHotPaths.py --benchmark-only
+#   pytest BenchHotPaths.py --benchmark-autosave   # then --benchmark-compare
+
+import random
+
+import pytest
+
+from Methods import Methods
+import Metrics
+
+SIZE = 100_000
+
+
+@pytest.fixture(params=[True, False], ids=['metrics', 'no-metrics'])
+def metrics_enabled(request):
+    Metrics.registry.enabled = request.param
+    yield request.param
+    Metrics.registry.enabled = True
+    Metrics.registry.reset()
+
+
+@pytest.fixture(scope='module')
+def roster(tmp_path_factory):
+    filename = tmp_path_factory.mktemp('roster') / 'player.txt'
+    with open(filename, 'w', encoding='utf-8') as file:
+        for i in range(SIZE):
+            file.write(f"Player{i};{1000 + i % 1000}\n")
+    return str(filename)
+
+
+@pytest.fixture
+def methods(roster):
+    methods = Methods(roster)
+    methods.load_file()
+    return methods
+
+
+def test_load_file(benchmark, roster, metrics_enabled):
+    def load():
+        Methods(roster).load_file()
+
+    benchmark(load)
+
+
+def test_save_file(benchmark, methods, tmp_path, metrics_enabled):
+    methods.filename = str(tmp_path / 'saved.txt')
+    benchmark(methods.save_file)
+
+
+def test_find_player(benchmark, methods, metrics_enabled):
+    names = [f"player{random.randrange(SIZE)}" for _ in range(1000)]
+
+    def lookups():
+        for name in names:
+            methods.find_player(name)
+
+    benchmark(lookups)
+
+
+def test_calculate_elo(benchmark, methods, metrics_enabled):
+    players = list(methods.players.values())
+    pairs = [random.sample(players, 2) for _ in range(1000)]
+
+    def matches():
+        for winner, loser in pairs:
+            methods.calculate_elo(winner, loser)
+
+    benchmark(matches)
+
+
+def test_leaderboard_rank_and_page(benchmark, methods, metrics_enabled):
+    players = random.sample(list(methods.players.values()), 1000)
+
+    def queries():
+        for i, player in enumerate(players):
+            methods.leaderboard.rank(player)
+            methods.leaderboard.page(i, 50)
+
+    benchmark(queries)
+
+
+def test_leaderboard_rows(benchmark, methods, metrics_enabled):
+    # The data side of LeaderboardView.refresh: one screenful of rows per scroll position
+    tops = [random.randrange(SIZE - 40) for _ in range(1000)]
+
+    def screens():
+        for top in tops:
+            players = methods.leaderboard.slice(top, 40)
+            [(top + i + 1, player.get_name(), player.get_elo()) for i, player in enumerate(players)]
+
+    benchmark(screens)
+
+
+def test_leaderboard_view_refresh(benchmark, methods, metrics_enabled):
+    tk = pytest.importorskip('tkinter')
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    from LeaderboardView import LeaderboardView
+
+    view = LeaderboardView(root, methods)
+    view.pack(fill='both', expand=True)
+    view._resize(41 * view.row_height)
+    tops = [random.randrange(SIZE - view.rows) for _ in range(100)]
+
+    def scrolls():
+        for top in tops:
+            view.top = top
+            view.refresh()
+
+    try:
+        benchmark(scrolls)
+    finally:
+        root.destroy()
+
+
+def test_player_accessors(benchmark, methods):
+    players = list(methods.players.values())[:1000]
+
+    def accessors():
+        for player in players:
+            player.set_elo(player.get_elo() + 1)
+            player.get_name()
+
+    benchmark(accessors)
@@ -0,0 +1,150 @@
+# Benchmark.py
+# Rough timings for the hot paths in Methods. Run with: python Benchmark.py
+
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from Methods import Methods
+
+
+def make_methods(size):
+    methods = Methods(filename=None)
+    for i in range(size):
+        methods.add_player(f"Player{i}", 1000 + i % 1000)
+    return methods
+
+
+def bench_lookup(sizes=(1_000, 10_000, 100_000, 200_000), lookups=100_000):
+    """Lookup cost should stay flat as the roster grows."""
+    print("find_player lookups")
+    for size in sizes:
+        methods = make_methods(size)
+        names = [f"PLAYER{random.randrange(size)}" for _ in range(lookups)]
+        start = time.perf_counter()
+        for name in names:
+            methods.find_player(name)
+        elapsed = time.perf_counter() - start
+        print(f"  {size:>9} players: {elapsed / lookups * 1e9:8.1f} ns/lookup")
+
+
+def bench_leaderboard(sizes=(1_000, 10_000, 100_000, 200_000), matches=10_000):
+    """A match should only move two players, whatever the roster size."""
+    print("calculate_elo + rank/top-10")
+    for size in sizes:
+        methods = make_methods(size)
+        players = list(methods.players.values())
+        pairs = [random.sample(players, 2) for _ in range(matches)]
+        start = time.perf_counter()
+        for winner, loser in pairs:
+            methods.calculate_elo(winner, loser)
+            methods.leaderboard.rank(winner)
+            methods.leaderboard.top(10)
+        elapsed = time.perf_counter() - start
+        print(f"  {size:>9} players: {elapsed / matches * 1e6:8.1f} us/match")
+
+
+def bench_batch(size=10_000, games=100_000):
+    """Scalar calculate_elo against both Batch modes (needs numpy)."""
+    print(f"{games} games over {size} players")
+    winners = [random.randrange(size) for _ in range(games)]
+    losers = [(w + random.randrange(1, size)) % size for w in winners]
+
+    methods = make_methods(size)
+    players = list(methods.players.values())
+    start = time.perf_counter()
+    for w, l in zip(winners, losers):
+        methods.calculate_elo(players[w], players[l])
+    print(f"  calculate_elo loop:   {time.perf_counter() - start:8.3f} s")
+
+    for simultaneous, label in ((False, "batch sequential:"), (True, "batch rating period:")):
+        methods = make_methods(size)
+        players = list(methods.players.values())
+        start = time.perf_counter()
+        methods.record_matches(players, winners, losers, simultaneous=simultaneous)
+        print(f"  {label:<21}{time.perf_counter() - start:8.3f} s")
+
+
+LOAD_SCRIPT = """
+import sys, time
+from Methods import Methods
+
+
+def peak_rss():
+    # Peak resident set size in bytes. On Linux ru_maxrss survives exec, so it
+    # would report the benchmark process that spawned us; VmHWM starts afresh
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows: the peak working set from GetProcessMemoryInfo
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (field, ctypes.c_size_t) for field in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                    'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage',
+                    'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+        counters = Counters(cb=ctypes.sizeof(Counters))
+        kernel32 = ctypes.WinDLL('kernel32')
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi = ctypes.WinDLL('psapi')
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(Counters), wintypes.DWORD]
+        psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024  # macOS reports bytes, Linux KiB
+
+
+methods = Methods(sys.argv[1])
+start = time.perf_counter()
+methods.load_file()
+elapsed = time.perf_counter() - start
+# Then use it a little, so a lazy format pays for its first lookups too
+start = time.perf_counter()
+for i in range(0, 1000, 7):
+    methods.leaderboard.rank(methods.find_player(f"Player{i}"))
+methods.leaderboard.top(10)
+used = time.perf_counter() - start
+print(elapsed, used, peak_rss())
+"""
+
+
+def bench_storage(sizes=(10_000, 1_000_000, 10_000_000)):
+    """load_file time, first lookups and peak RSS for player.txt against a Roster file (needs numpy)."""
+    import Roster
+
+    print("load_file: text vs roster")
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            text = os.path.join(tmp, f"{size}.txt")
+            store = os.path.join(tmp, f"{size}.elo")
+            with open(text, 'w', encoding='utf-8') as file:
+                for i in range(size):
+                    file.write(f"Player{i};{1000 + i % 1000}\n")
+            Roster.convert(text, store)
+            for label, filename in (("text", text), ("roster", store)):
+                result = subprocess.run([sys.executable, "-c", LOAD_SCRIPT, filename],
+                                        cwd=here, capture_output=True, text=True, check=True)
+                elapsed, used, rss = result.stdout.split()
+                print(f"  {size:>9} players, {label:<6}: {float(elapsed):8.3f} s load, "
+                      f"{float(used) * 1000:7.1f} ms first use, {int(rss) >> 20:6} MB peak RSS")
+
+
+if __name__ == "__main__":
+    bench_lookup()
+    bench_leaderboard()
+    bench_batch()
+    bench_storage()
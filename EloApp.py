@@ -1,27 +1,41 @@
+import time
+
+STARTED = time.perf_counter()  # before the other imports, for --startup-bench <file>
+
 from Methods import Methods
+import Metrics
+import os
+import sys
+import threading
 import tkinter as tk
-from tkinter import messagebox
-from datetime import datetime
 
 
+# messagebox (and the leaderboard's ttk widgets) are imported on first use
+# so they stay off the path to the first window paint
+def show_info(title, message):
+    from tkinter import messagebox
+    messagebox.showinfo(title, message)
+
+
+def show_error(title, message):
+    from tkinter import messagebox
+    messagebox.showerror(title, message)
+
 
 class EloApp:
-    def __init__(self, root):
-        self.methods = Methods()
-        self.methods.load_file()
+    def __init__(self, root, startup_bench=None):
+        self.methods = Methods(journal_filename='player.journal', history_filename='player.history')
+        self.startup_bench = startup_bench  # file to append start-up timings to
 
         self.root = root
-        self.root.title("ELO Ranking System")
-
-        # Scrollbar
-        frame = tk.Frame(root)
-        frame.pack(fill='both', expand=True)
-        self.output = tk.Text(frame, height=10, width=50)
-        scrollbar = tk.Scrollbar(frame, command=self.output.yview)
-        self.output.configure(yscrollcommand=scrollbar.set)
+        self.root.title("ELO Ranking System (loading...)")
 
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.output.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # Placeholder until the roster has loaded in the background
+        self.board_frame = tk.Frame(root)
+        self.board_frame.pack(fill='both', expand=True)
+        self.loading_label = tk.Label(self.board_frame, text="Loading players...", height=10, width=50)
+        self.loading_label.pack(fill='both', expand=True)
+        self.leaderboard = None
 
         # Frame for Buttons
         button_frame = tk.Frame(root)
@@ -47,22 +61,58 @@ class EloApp:
         self.save_button = tk.Button(button_frame, text="Save and Exit", command=self.save_and_exit)
         self.save_button.pack(side=tk.TOP, fill='x', pady=2)
 
+        # Buttons stay disabled until the players are loaded
+        self.buttons = [self.add_button, self.edit_button, self.delete_button, self.match_button, self.save_button]
+        for button in self.buttons:
+            button.config(state=tk.DISABLED)
+
+        if startup_bench:
+            self.root.after_idle(self.report, "first_paint")
+        self.load_error = None
+        self.loaded = threading.Event()
+        threading.Thread(target=self.load_players, daemon=True).start()
+        self.root.after(20, self.check_loaded)
+
+    def report(self, event):
+        # Written to a file: a windowed frozen build has no stdout
+        with open(self.startup_bench, 'a', encoding='utf-8') as file:
+            file.write(f"{event} {time.perf_counter() - STARTED:.4f}\n")
+
+    def load_players(self):
+        # Runs on a worker thread; the UI does not touch self.methods until loaded is set
+        try:
+            self.methods.load_file()
+        except Exception as error:
+            self.load_error = error
+        self.loaded.set()
+
+    def check_loaded(self):
+        if not self.loaded.is_set():
+            self.root.after(20, self.check_loaded)
+            return
+        if self.load_error:
+            show_error("Error", f"Could not load players: {self.load_error}")
+            self.root.quit()
+            return
+
+        from LeaderboardView import LeaderboardView
+
+        self.loading_label.destroy()
+        self.leaderboard = LeaderboardView(self.board_frame, self.methods)
+        self.leaderboard.pack(fill='both', expand=True)
+        for button in self.buttons:
+            button.config(state=tk.NORMAL)
+        self.root.title("ELO Ranking System")
+
         # Initial Player List Display
         self.list_players()
-
-    def log_action(self, action_description):
-        """Log the action with a timestamp."""
-        with open("actions.log", "a") as log_file:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            log_file.write(f"[{timestamp}] {action_description}\n")
+        if self.startup_bench:
+            self.root.update_idletasks()
+            self.report("roster_loaded")
+            self.root.destroy()
 
     def list_players(self):
-        self.output.delete(1.0, tk.END)  # Clear previous output
-        self.methods.list_players()
-        count = 0
-        for player in self.methods.players:
-            count += 1
-            self.output.insert(tk.END, f"{count}. {player.get_name()} : {player.get_elo()}\n")
+        self.leaderboard.reload()  # Only the visible rows are redrawn
 
     def add_player(self):
         add_window = tk.Toplevel(self.root)
@@ -81,13 +131,14 @@ class EloApp:
             name = name_entry.get()
             try:
                 rating = int(rating_entry.get())
-                self.methods.add_player(name, rating)
-                messagebox.showinfo("Success", f"Added player: {name} with Elo rating {rating}")
+                if not self.methods.add_player(name, rating):
+                    show_error("Error", f"Player {name} already exists")
+                    return
+                show_info("Success", f"Added player: {name} with Elo rating {rating}")
                 self.list_players()  # Refresh the player list
-                self.log_action(f"Added player: {name} with Elo rating {rating}")
                 add_window.destroy()
             except ValueError:
-                messagebox.showerror("Error", "Elo rating must be a number")
+                show_error("Error", "Elo rating must be a number")
 
         submit_button = tk.Button(add_window, text="Submit", command=submit)
         submit_button.pack()
@@ -115,20 +166,20 @@ class EloApp:
                 current_name = current_name_entry.get()
                 player = self.methods.find_player(current_name)
                 if player:
-                    old_elo = player.get_elo()  # Log the old Elo rating
                     new_name = new_name_entry.get() or player.get_name()
                     try:
                         new_rating = int(new_rating_entry.get()) if new_rating_entry.get() else player.get_elo()
-                        player.set_name(new_name)
-                        player.set_elo(new_rating)
-                        messagebox.showinfo("Success", f"Player {current_name} updated to {new_name} with Elo rating {new_rating}")
+                        if not self.methods.rename_player(player, new_name):
+                            show_error("Error", f"Player {new_name} already exists")
+                            return
+                        self.methods.set_elo(player, new_rating)
+                        show_info("Success", f"Player {current_name} updated to {new_name} with Elo rating {new_rating}")
                         self.list_players()  # Refresh the player list
-                        self.log_action(f"Edited player: {current_name} to {new_name} with Elo change: {old_elo} -> {new_rating}")
                         edit_window.destroy()
                     except ValueError:
-                        messagebox.showerror("Error", "Elo rating must be a number")
+                        show_error("Error", "Elo rating must be a number")
                 else:
-                    messagebox.showerror("Error", f"Player {current_name} not found")
+                    show_error("Error", f"Player {current_name} not found")
 
             submit_button = tk.Button(edit_window, text="Submit", command=submit)
             submit_button.pack()
@@ -148,13 +199,12 @@ class EloApp:
             name = name_entry.get()
             player = self.methods.find_player(name)
             if player:
-                self.methods.players.remove(player)
-                messagebox.showinfo("Success", f"Player {name} deleted")
+                self.methods.delete_player(player)
+                show_info("Success", f"Player {name} deleted")
                 self.list_players()  # Refresh the player list
-                self.log_action(f"Deleted player: {name}")
                 delete_window.destroy()
             else:
-                messagebox.showerror("Error", f"Player {name} not found")
+                show_error("Error", f"Player {name} not found")
 
         submit_button = tk.Button(delete_window, text="Submit", command=submit)
         submit_button.pack()
@@ -181,15 +231,12 @@ class EloApp:
             loser = self.methods.find_player(loser_name)
 
             if winner and loser:
-                old_winner_elo = winner.get_elo()  # Log the old Elo rating
-                old_loser_elo = loser.get_elo()
                 self.methods.calculate_elo(winner, loser)
-                messagebox.showinfo("Success", "Match recorded and Elo ratings updated")
+                show_info("Success", "Match recorded and Elo ratings updated")
                 self.list_players()  # Refresh the player list
-                self.log_action(f"Recorded match: {winner_name} (Elo: {old_winner_elo} -> {winner.get_elo()}) vs {loser_name} (Elo: {old_loser_elo} -> {loser.get_elo()})")
                 match_window.destroy()
             else:
-                messagebox.showerror("Error", "One or both players not found")
+                show_error("Error", "One or both players not found")
 
         submit_button = tk.Button(match_window, text="Submit", command=submit)
         submit_button.pack()
@@ -198,12 +245,18 @@ class EloApp:
 
     def save_and_exit(self):
         self.methods.save_file()
-        self.log_action("Saved player data and exited the program")
-        messagebox.showinfo("Saved", "Player data saved successfully")
+        self.methods.close()
+        show_info("Saved", "Player data saved successfully")
         self.root.quit()
 
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = EloApp(root)
-    root.mainloop()
\ No newline at end of file
+    startup_bench = None
+    if '--startup-bench' in sys.argv[:-1]:
+        startup_bench = sys.argv[sys.argv.index('--startup-bench') + 1]
+    app = EloApp(root, startup_bench)
+    with Metrics.profiling_from_env():
+        root.mainloop()
+    if os.environ.get('ELO_METRICS'):
+        Metrics.registry.dump(os.environ['ELO_METRICS'])
\ No newline at end of file
@@ -0,0 +1,222 @@
+# History.py
+# Match history with per-player indexes for point-in-time rating queries.
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+import Journal
+from Methods import elo_update
+
+# Fields of a match entry
+TIME, WINNER, LOSER, WINNER_OLD, WINNER_NEW, LOSER_OLD, LOSER_NEW = range(7)
+
+
+class History:
+    """Every recorded match, indexed by player.
+
+    Players get an internal id so renames only move a name, not their
+    history. Each player keeps the ids and times of their matches, so
+    rating_at is a bisect rather than a replay, and recompute only replays
+    from the first changed match: a player's rating going into it is read
+    off their previous match instead of from a snapshot of every rating.
+
+    The history is persisted in its own journal file (see Journal.py) of
+    MATCH, RENAME and DELETE records.
+    """
+
+    def __init__(self, filename):
+        self.journal = Journal.Journal(filename)
+        self.ids = {}  # case-folded current name -> player id
+        self.names = []  # player id -> current name
+        self.log = []  # records in file order; a MATCH record holds its match index instead of values
+        self.matches = []  # match entries (see the field constants above); None once deleted
+        self.by_player = {}  # player id -> ascending match indexes
+        self.times = {}  # player id -> timestamps parallel to by_player
+        self.peaks = {}  # player id -> highest rating reached
+        self.current = {}  # player id -> rating after their latest match
+        self.initial = {}  # player id -> rating going into their first recorded match
+
+    @staticmethod
+    def _key(name):
+        return name.lower()
+
+    def load(self):
+        for kind, timestamp, names, values in self.journal.replay():
+            if kind == Journal.MATCH:
+                self._add_match(timestamp, names, values)
+            elif kind == Journal.RENAME:
+                self._rename(names[0], names[1], timestamp)
+            elif kind == Journal.DELETE:
+                self._forget(names[0], timestamp)
+
+    def close(self):
+        self.journal.close()
+
+    def _id(self, name):
+        key = self._key(name)
+        if key not in self.ids:
+            self.ids[key] = len(self.names)
+            self.names.append(name)
+        return self.ids[key]
+
+    def _add_match(self, timestamp, names, values):
+        winner, loser = self._id(names[0]), self._id(names[1])
+        index = len(self.matches)
+        self.matches.append([timestamp, winner, loser, *values])
+        self.log.append((Journal.MATCH, timestamp, names, index))
+        for player, old, new in ((winner, values[0], values[1]), (loser, values[2], values[3])):
+            self.initial.setdefault(player, old)
+            self.by_player.setdefault(player, []).append(index)
+            self.times.setdefault(player, []).append(timestamp)
+            self.peaks[player] = max(self.peaks.get(player, old), old, new)
+            self.current[player] = new
+
+    def _rename(self, old_name, new_name, timestamp):
+        player = self.ids.pop(self._key(old_name), None)
+        if player is not None:
+            self.ids[self._key(new_name)] = player
+            self.names[player] = new_name
+        self.log.append((Journal.RENAME, timestamp, [old_name, new_name], ()))
+
+    def _forget(self, name, timestamp):
+        # The matches stay for the other players; a new player reusing the name starts fresh
+        self.ids.pop(self._key(name), None)
+        self.log.append((Journal.DELETE, timestamp, [name], ()))
+
+    def record_match(self, winner_name, loser_name, winner_old, winner_new, loser_old, loser_new, flush=True):
+        values = [winner_old, winner_new, loser_old, loser_new]
+        self.journal.append(Journal.MATCH, [winner_name, loser_name], values, flush)
+        self._add_match(self.journal.last_timestamp, [winner_name, loser_name], values)
+
+    def rename(self, old_name, new_name):
+        self.journal.append(Journal.RENAME, [old_name, new_name])
+        self._rename(old_name, new_name, self.journal.last_timestamp)
+
+    def forget(self, name):
+        self.journal.append(Journal.DELETE, [name])
+        self._forget(name, self.journal.last_timestamp)
+
+    def _rating_after(self, match, player):
+        return match[WINNER_NEW] if match[WINNER] == player else match[LOSER_NEW]
+
+    def _rating_before(self, match, player):
+        return match[WINNER_OLD] if match[WINNER] == player else match[LOSER_OLD]
+
+    def _rating_going_into(self, player, index):
+        """player's rating before match index, as left by their previous match."""
+        indexes = self.by_player[player]
+        i = bisect_left(indexes, index)
+        if i == 0:
+            return self.initial[player]
+        return self._rating_after(self.matches[indexes[i - 1]], player)
+
+    def rating_at(self, name, when):
+        """Rating of name at when (a datetime or unix time), or None if they had no matches yet."""
+        if isinstance(when, datetime):
+            when = when.timestamp()
+        player = self.ids.get(self._key(name))
+        if player is None or not self.by_player.get(player):
+            return None
+        i = bisect_right(self.times[player], when)
+        if i == 0:
+            first = self.matches[self.by_player[player][0]]
+            return self._rating_before(first, player)
+        return self._rating_after(self.matches[self.by_player[player][i - 1]], player)
+
+    def peak(self, name):
+        return self.peaks.get(self.ids.get(self._key(name)))
+
+    def player_matches(self, name):
+        """(match id, time, winner, loser, rating before, rating after) for each of name's matches.
+
+        Match ids are positions in the history, so they shift once a deletion
+        has been saved and the history is loaded again.
+        """
+        player = self.ids.get(self._key(name))
+        result = []
+        for index in self.by_player.get(player, ()):
+            match = self.matches[index]
+            result.append((index, datetime.fromtimestamp(match[TIME]), self.names[match[WINNER]],
+                           self.names[match[LOSER]], self._rating_before(match, player),
+                           self._rating_after(match, player)))
+        return result
+
+    def delete_match(self, index, k=32):
+        """Drop a mis-entered match and recompute everything after it.
+
+        Returns {name: rating} for current players whose rating changed.
+        """
+        match = self.matches[index]
+        if match is None:
+            raise ValueError(f"Match {index} has already been deleted")
+        self.matches[index] = None
+        before = dict(self.current)
+        players = {match[WINNER], match[LOSER]}
+        for player in players:
+            position = self.by_player[player].index(index)
+            del self.by_player[player][position]
+            del self.times[player][position]
+        touched = self._replay(index, k)
+        for player in players - touched:  # no later matches to replay
+            self.current[player] = self._rating_going_into(player, index)
+        touched |= players
+        self._update_peaks(players)
+        self._save()
+        return self._changed(before, touched)
+
+    def recompute(self, start=0, k=32):
+        """Re-rate every match from start onwards.
+
+        Players start from the rating recorded for their first match; manual
+        rating edits made between matches are not in the history and are
+        replaced by the recomputed values. Returns {name: rating} for
+        current players whose rating changed.
+        """
+        before = dict(self.current)
+        touched = self._replay(start, k)
+        self._save()
+        return self._changed(before, touched)
+
+    def _replay(self, start, k):
+        ratings = {}  # player id -> rating so far in this replay
+        for index in range(start, len(self.matches)):
+            match = self.matches[index]
+            if match is None:
+                continue
+            winner, loser = match[WINNER], match[LOSER]
+            for player in (winner, loser):
+                if player not in ratings:
+                    ratings[player] = self._rating_going_into(player, index)
+            match[WINNER_OLD], match[LOSER_OLD] = ratings[winner], ratings[loser]
+            match[WINNER_NEW], match[LOSER_NEW] = elo_update(ratings[winner], ratings[loser], k)
+            ratings[winner], ratings[loser] = match[WINNER_NEW], match[LOSER_NEW]
+
+        self.current.update(ratings)
+        touched = set(ratings)
+        self._update_peaks(touched)
+        return touched
+
+    def _update_peaks(self, players):
+        for player in players:
+            history = [self.matches[index] for index in self.by_player[player]]
+            if history:
+                self.peaks[player] = max([self._rating_before(history[0], player)] +
+                                         [self._rating_after(match, player) for match in history])
+            else:
+                self.peaks.pop(player, None)
+
+    def _changed(self, before, players):
+        live = set(self.ids.values())
+        return {self.names[player]: self.current[player] for player in players
+                if player in live and self.current.get(player) != before.get(player)}
+
+    def _save(self):
+        records = []
+        for kind, timestamp, names, values in self.log:
+            if kind == Journal.MATCH:
+                match = self.matches[values]
+                if match is None:
+                    continue
+                values = match[WINNER_OLD:]
+            records.append((kind, timestamp, names, values))
+        self.journal.rewrite(records)
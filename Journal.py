@@ -0,0 +1,208 @@
+# Journal.py
+# Append-only binary log of roster and match events.
+
+import os
+import struct
+import sys
+import time
+import zlib
+
+ADD, RENAME, SET_ELO, DELETE, MATCH, RESULT = range(6)
+
+# kind -> (number of names, number of integers) carried by the record
+FIELDS = {
+    ADD: (1, 1),  # name, rating
+    RENAME: (2, 0),  # old name, new name
+    SET_ELO: (1, 2),  # name, old rating, new rating
+    DELETE: (1, 0),  # name
+    MATCH: (2, 4),  # winner, loser, winner old/new, loser old/new
+    RESULT: (2, 0),  # winner, loser of a batch game; ratings follow as SET_ELO records
+}
+
+FRAME = struct.Struct('<II')  # body length, crc32 of body
+HEADER = struct.Struct('<Bd')  # kind, unix timestamp
+NAME_LEN = struct.Struct('<H')
+INT = struct.Struct('<q')
+
+
+def encode(kind, names, values, timestamp):
+    parts = [HEADER.pack(kind, timestamp)]
+    for name in names:
+        data = name.encode('utf-8')
+        parts.append(NAME_LEN.pack(len(data)))
+        parts.append(data)
+    parts.extend(INT.pack(value) for value in values)
+    body = b''.join(parts)
+    return FRAME.pack(len(body), zlib.crc32(body)) + body
+
+
+def decode(body):
+    kind, timestamp = HEADER.unpack_from(body)
+    n_names, n_values = FIELDS[kind]
+    pos = HEADER.size
+    names = []
+    for _ in range(n_names):
+        (length,) = NAME_LEN.unpack_from(body, pos)
+        pos += NAME_LEN.size
+        names.append(body[pos:pos + length].decode('utf-8'))
+        pos += length
+    values = [INT.unpack_from(body, pos + i * INT.size)[0] for i in range(n_values)]
+    return kind, timestamp, names, values
+
+
+def read_records(filename, offset=0):
+    """Yield (end offset, record) pairs, stopping at the first torn or corrupt record."""
+    with open(filename, 'rb') as file:
+        file.seek(offset)
+        while True:
+            frame = file.read(FRAME.size)
+            if len(frame) < FRAME.size:
+                return
+            length, crc = FRAME.unpack(frame)
+            body = file.read(length)
+            if len(body) < length or zlib.crc32(body) != crc:
+                return
+            offset += FRAME.size + length
+            yield offset, decode(body)
+
+
+def replace(tmp, filename):
+    """os.replace a written and fsynced tmp file, then fsync the directory so the rename is durable too."""
+    os.replace(tmp, filename)
+    if os.name == 'posix':  # Windows cannot open a directory to sync it
+        fd = os.open(os.path.dirname(os.path.abspath(filename)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def describe(record):
+    """Render a record as an actions.log style line."""
+    from datetime import datetime  # only needed when dumping the log
+
+    kind, timestamp, names, values = record
+    stamp = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+    if kind == ADD:
+        text = f"Added player: {names[0]} with Elo rating {values[0]}"
+    elif kind == RENAME:
+        text = f"Renamed player: {names[0]} to {names[1]}"
+    elif kind == SET_ELO:
+        text = f"Set Elo of {names[0]}: {values[0]} -> {values[1]}"
+    elif kind == DELETE:
+        text = f"Deleted player: {names[0]}"
+    elif kind == MATCH:
+        text = (f"Recorded match: {names[0]} (Elo: {values[0]} -> {values[1]}) "
+                f"vs {names[1]} (Elo: {values[2]} -> {values[3]})")
+    else:
+        text = f"Recorded batch match: {names[0]} beat {names[1]}"
+    return f"[{stamp}] {text}"
+
+
+class Journal:
+    """Buffered append-only journal file.
+
+    Each record is flushed to the OS as it is written (unless the caller
+    batches with flush=False) and fsynced every sync_every records. The byte
+    offset covered by the last snapshot is kept in a small side file so
+    startup only replays the tail. The file is opened for appending once
+    replay() has read it; writing without a replay opens it first.
+    """
+
+    def __init__(self, filename, sync_every=64):
+        self.filename = filename
+        self.snapshot_filename = filename + '.snap'
+        self.sync_every = sync_every
+        self.unsynced = 0
+        self.since_snapshot = 0
+        self.last_timestamp = None
+        self.file = None
+
+    def snapshot_offset(self):
+        try:
+            with open(self.snapshot_filename, 'r', encoding='utf-8') as file:
+                return int(file.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def replay(self):
+        """Yield the records written since the last snapshot, then open for appending."""
+        offset = self.snapshot_offset()
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) < offset:
+            offset = 0  # journal was removed or replaced; trust the snapshot alone
+        end = offset
+        if os.path.exists(self.filename):
+            for end, record in read_records(self.filename, offset):
+                self.since_snapshot += 1
+                yield record
+        self.file = open(self.filename, 'ab')
+        if self.file.tell() > end:
+            # Drop a torn tail left by a crash so new records stay readable
+            self.file.truncate(end)
+
+    def open(self):
+        """Open for appending without handing back the records, if replay() has not."""
+        if self.file is None:
+            for _ in self.replay():
+                pass
+
+    def append(self, kind, names, values=(), flush=True):
+        self.open()
+        self.last_timestamp = time.time()
+        self.file.write(encode(kind, names, values, self.last_timestamp))
+        self.since_snapshot += 1
+        self.unsynced += 1
+        if flush:
+            self.flush()
+
+    def flush(self):
+        if self.file is None:
+            return  # nothing written yet
+        self.file.flush()
+        if self.unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def mark_snapshot(self):
+        """Record that everything journaled so far is covered by the snapshot on disk.
+
+        Call only once the snapshot itself is durable: startup skips the
+        journal up to the offset written here.
+        """
+        self.open()
+        self.sync()
+        tmp = self.snapshot_filename + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as file:
+            file.write(str(self.file.tell()))
+            file.flush()
+            os.fsync(file.fileno())
+        replace(tmp, self.snapshot_filename)
+        self.since_snapshot = 0
+
+    def rewrite(self, records):
+        """Replace the whole journal with records (kind, timestamp, names, values)."""
+        self.close()
+        tmp = self.filename + '.tmp'
+        with open(tmp, 'wb') as file:
+            for kind, timestamp, names, values in records:
+                file.write(encode(kind, names, values, timestamp))
+            file.flush()
+            os.fsync(file.fileno())
+        replace(tmp, self.filename)
+        self.file = open(self.filename, 'ab')
+
+    def close(self):
+        if self.file:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+
+if __name__ == "__main__":
+    # python Journal.py player.journal  -> print the audit log
+    for _, entry in read_records(sys.argv[1] if len(sys.argv) > 1 else 'player.journal'):
+        print(describe(entry))
@@ -0,0 +1,161 @@
+# Leaderboard.py
+
+from bisect import bisect_left, insort
+from itertools import chain, islice
+from operator import neg
+
+
+class Leaderboard:
+    """Players kept in rank order so a rating change only moves that player.
+
+    Entries are (-rating, seq, player) tuples; seq is a per-insertion counter
+    so ties keep a stable order and players are never compared directly.
+    The entries live in a list of short sorted sublists (``maxes`` holds the
+    last entry of each), so an update only shifts one sublist instead of the
+    whole roster.  ``index`` is a Fenwick tree over the sublist lengths, so
+    rank and slice find a position in O(log n) rather than summing every
+    sublist in front of it; it is rebuilt (O(n / load)) only when a sublist
+    is split or dropped.
+    """
+
+    load = 1000  # sublists are split once they grow past twice this size
+
+    def __init__(self):
+        self.lists = []
+        self.maxes = []
+        self.keys = {}  # id(player) -> its entry
+        self.seq = 0
+        self.index = [0]  # 1-based Fenwick tree over len(self.lists[i])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, player):
+        return id(player) in self.keys
+
+    def _locate(self, entry):
+        i = bisect_left(self.maxes, entry)
+        return min(i, len(self.maxes) - 1)
+
+    def _build_index(self):
+        index = [0] + [len(sublist) for sublist in self.lists]
+        for i in range(1, len(index)):
+            j = i + (i & -i)
+            if j < len(index):
+                index[j] += index[i]
+        self.index = index
+
+    def _resize(self, i, delta):
+        i += 1
+        while i < len(self.index):
+            self.index[i] += delta
+            i += i & -i
+
+    def _offset(self, i):
+        """How many entries come before sublist i."""
+        total = 0
+        while i:
+            total += self.index[i]
+            i -= i & -i
+        return total
+
+    def _find(self, pos):
+        """The (sublist, position within it) of entry number pos."""
+        i = 0
+        step = 1 << (len(self.index) - 1).bit_length()
+        while step:
+            j = i + step
+            if j < len(self.index) and self.index[j] <= pos:
+                pos -= self.index[j]
+                i = j
+            step >>= 1
+        return i, pos
+
+    def add(self, player):
+        entry = (-player.get_elo(), self.seq, player)
+        self.seq += 1
+        self.keys[id(player)] = entry
+        if not self.lists:
+            self.lists.append([entry])
+            self.maxes.append(entry)
+            self._build_index()
+            return
+        i = self._locate(entry)
+        sublist = self.lists[i]
+        insort(sublist, entry)
+        self.maxes[i] = sublist[-1]
+        if len(sublist) > 2 * self.load:
+            half = sublist[self.load:]
+            del sublist[self.load:]
+            self.maxes[i] = sublist[-1]
+            self.lists.insert(i + 1, half)
+            self.maxes.insert(i + 1, half[-1])
+            self._build_index()
+        else:
+            self._resize(i, 1)
+
+    def add_many(self, players, ratings=None):
+        # ratings can be passed in bulk when reading them one player at a time is slow
+        players = list(players)
+        if ratings is None:
+            ratings = [player.get_elo() for player in players]
+        seqs = range(self.seq, self.seq + len(players))
+        self.seq += len(players)
+        self.keys.update(zip(map(id, players), zip(map(neg, ratings), seqs, players)))
+        entries = sorted(self.keys.values())
+        self.lists = [entries[i:i + self.load] for i in range(0, len(entries), self.load)]
+        self.maxes = [sublist[-1] for sublist in self.lists]
+        self._build_index()
+
+    def remove(self, player):
+        entry = self.keys.pop(id(player))
+        i = self._locate(entry)
+        sublist = self.lists[i]
+        del sublist[bisect_left(sublist, entry)]
+        if sublist:
+            self.maxes[i] = sublist[-1]
+            self._resize(i, -1)
+        else:
+            del self.lists[i]
+            del self.maxes[i]
+            self._build_index()
+
+    def set_elo(self, player, elo):
+        self.remove(player)
+        player.set_elo(elo)
+        self.add(player)
+
+    def rank(self, player):
+        entry = self.keys[id(player)]
+        i = self._locate(entry)
+        return self._offset(i) + bisect_left(self.lists[i], entry) + 1
+
+    def count_before(self, key):
+        """How many entries sort before key, a (-rating, seq) pair."""
+        i = bisect_left(self.maxes, key)
+        if i == len(self.lists):
+            return len(self.keys)
+        return self._offset(i) + bisect_left(self.lists[i], key)
+
+    def entries(self, start=0):
+        """The entries from position start onwards, in rank order."""
+        i, start = self._find(start)
+        for j in range(i, len(self.lists)):
+            yield from self.lists[j][start:]
+            start = 0
+
+    def top(self, k=None):
+        return [entry[2] for entry in islice(chain.from_iterable(self.lists), k)]
+
+    def page(self, p, size=50):
+        return self.slice(p * size, size)
+
+    def slice(self, start, count):
+        """The count players from rank start + 1 onwards."""
+        i, start = self._find(start)
+        players = []
+        while i < len(self.lists) and len(players) < count:
+            players.extend(entry[2] for entry in self.lists[i][start:start + count - len(players)])
+            i += 1
+            start = 0
+        return players
@@ -0,0 +1,200 @@
+# LeaderboardView.py
+
+import queue
+import threading
+import time
+import tkinter as tk
+from itertools import islice
+from tkinter import ttk
+
+from Metrics import timed
+
+SEARCH_DELAY = 150  # ms to wait after the last keystroke before searching
+SEARCH_LIMIT = 1000
+SEARCH_CHUNK = 10_000  # index entries read per hold of the GIL
+
+
+class LeaderboardView(tk.Frame):
+    """Leaderboard that only ever holds the rows that fit on screen.
+
+    The Treeview keeps a fixed set of row items, and scrolling or refresh
+    only rewrites the values of rows whose text changed, reading the players
+    for the visible window straight from the Methods leaderboard. Typing in
+    the search box narrows the list to names starting with the text; the
+    scan runs on a worker thread that reads the player index a chunk at a
+    time, giving the UI thread the GIL between chunks, and the UI thread
+    picks the result up with an after() poll, since Tk calls must stay on
+    the UI thread. Call reload() after the players
+    change so an active search is run again against the new ratings.
+    """
+
+    def __init__(self, master, methods):
+        super().__init__(master)
+        self.methods = methods
+        self.top = 0  # index of the first visible row
+        self.rows = 0
+        self.shown = []  # values currently displayed in each row item
+        self.results = None  # players matching the search, or None for the full leaderboard
+        self.search_job = None
+        self.search_generation = 0
+        self.search_prefix = None  # text of the latest search, None for no search
+        self.results_prefix = None  # text the shown results were searched for
+        self.search_results = queue.Queue()
+
+        search_frame = tk.Frame(self)
+        search_frame.pack(fill='x')
+        tk.Label(search_frame, text="Search:").pack(side=tk.LEFT)
+        self.search_text = tk.StringVar()
+        self.search_text.trace_add('write', lambda *args: self._schedule_search())
+        tk.Entry(search_frame, textvariable=self.search_text).pack(side=tk.LEFT, fill='x', expand=True)
+        self.search_status = tk.Label(search_frame)  # says when the matches were cut off
+        self.search_status.pack(side=tk.LEFT)
+
+        table_frame = tk.Frame(self)
+        table_frame.pack(fill='both', expand=True)
+        self.tree = ttk.Treeview(table_frame, columns=('rank', 'name', 'rating'), show='headings', selectmode='none')
+        self.tree.heading('rank', text="#")
+        self.tree.heading('name', text="Name")
+        self.tree.heading('rating', text="Elo")
+        self.tree.column('rank', width=60, anchor='e', stretch=False)
+        self.tree.column('rating', width=70, anchor='e', stretch=False)
+        self.scrollbar = tk.Scrollbar(table_frame, command=self._scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        self.tree.bind('<Configure>', lambda event: self._resize(event.height))
+        self.tree.bind('<MouseWheel>', lambda event: self._scroll('scroll', -event.delta // 120, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self._scroll('scroll', -3, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self._scroll('scroll', 3, 'units'))
+
+    def _count(self):
+        return len(self.methods.leaderboard) if self.results is None else len(self.results)
+
+    def _visible(self):
+        if self.results is None:
+            players = self.methods.leaderboard.slice(self.top, self.rows)
+            return [(self.top + i + 1, player) for i, player in enumerate(players)]
+        players = self.results[self.top:self.top + self.rows]
+        return [(self.methods.leaderboard.rank(player), player) for player in players]
+
+    def _resize(self, height):
+        rows = max(1, height // self.row_height - 1)  # one row's worth goes to the headings
+        if rows == self.rows:
+            return
+        while len(self.shown) < rows:
+            self.tree.insert('', tk.END, iid=str(len(self.shown)), values=('', '', ''))
+            self.shown.append(('', '', ''))
+        while len(self.shown) > rows:
+            self.shown.pop()
+            self.tree.delete(str(len(self.shown)))
+        self.rows = rows
+        self.refresh()
+
+    def _scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            top = int(float(amount) * self._count())
+        elif unit == 'pages':
+            top = self.top + int(amount) * self.rows
+        else:
+            top = self.top + int(amount)
+        self.top = max(0, min(top, self._count() - self.rows))
+        self.refresh()
+
+    @timed('leaderboard_view_refresh')
+    def refresh(self):
+        """Redraw the visible rows, touching only the ones whose text changed."""
+        if self.results is not None:
+            self.results = [player for player in self.results if player in self.methods.leaderboard]
+        count = self._count()
+        self.top = max(0, min(self.top, count - self.rows))
+        visible = self._visible()
+        for i in range(self.rows):
+            if i < len(visible):
+                rank, player = visible[i]
+                values = (rank, player.get_name(), player.get_elo())
+            else:
+                values = ('', '', '')
+            if values != self.shown[i]:
+                self.tree.item(str(i), values=values)
+                self.shown[i] = values
+        if count:
+            self.scrollbar.set(self.top / count, min(1.0, (self.top + self.rows) / count))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def reload(self):
+        """Redraw after players were added, changed or removed."""
+        self.refresh()  # drops deleted players from the search results straight away
+        if self.results is not None:
+            self._start_search()  # then picks up new, renamed and re-rated ones in order
+
+    def _schedule_search(self):
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DELAY, self._start_search)
+
+    def _start_search(self):
+        self.search_job = None
+        self.search_generation += 1
+        prefix = self.search_prefix = self.search_text.get().strip().lower() or None
+        if not prefix:
+            self._show_results(self.search_generation, None)
+            return
+        generation = self.search_generation
+        threading.Thread(target=self._search, args=(generation, prefix), daemon=True).start()
+        self.after(20, self._poll_search, generation)
+
+    def _scan(self, prefix):
+        # Copying the whole index in one call would hold the GIL, and so
+        # freeze the UI, for the length of the copy on a large roster. If
+        # the UI thread adds or removes a player mid-scan the iterator
+        # raises and the scan starts over; a rename is followed by reload(),
+        # which searches again anyway.
+        for _ in range(3):
+            entries = iter(self.methods.players.items())
+            matches = []
+            try:
+                while True:
+                    chunk = list(islice(entries, SEARCH_CHUNK))
+                    if not chunk:
+                        return matches
+                    matches.extend(player for key, player in chunk if key.startswith(prefix))
+                    time.sleep(0)  # hand the GIL to the UI thread
+            except RuntimeError:
+                continue
+        # Still changing underneath us: settle for one copy in a single call
+        return [player for key, player in list(self.methods.players.items()) if key.startswith(prefix)]
+
+    def _search(self, generation, prefix):
+        search = getattr(self.methods.players, 'search', None)
+        if search:  # a Roster.Players answers from the file's sorted name index
+            matches, total = search(prefix, SEARCH_LIMIT)
+        else:
+            matches = self._scan(prefix)
+            matches.sort(key=lambda player: -player.get_elo())
+            total = len(matches)
+            del matches[SEARCH_LIMIT:]
+        self.search_results.put((generation, matches, total))
+
+    def _poll_search(self, generation):
+        while not self.search_results.empty():
+            finished, matches, total = self.search_results.get_nowait()
+            if finished == self.search_generation:
+                self._show_results(finished, matches, total)
+                return
+        if generation == self.search_generation:
+            self.after(20, self._poll_search, generation)
+
+    def _show_results(self, generation, results, total=0):
+        if generation != self.search_generation:
+            return  # a newer search has started since
+        if results is not None and total > len(results):
+            self.search_status.config(text=f"top {len(results)} of {total} matches")
+        else:
+            self.search_status.config(text="")
+        if self.search_prefix != self.results_prefix:
+            self.top = 0  # a new search, not a reload of the current one
+            self.results_prefix = self.search_prefix
+        self.results = results
+        self.refresh()
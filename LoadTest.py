@@ -0,0 +1,106 @@
+# LoadTest.py
+# Fire match submissions at Service.py and report throughput and latency.
+#
+#   python LoadTest.py                      # starts a throwaway local service
+#   python LoadTest.py --url 127.0.0.1:8080 --connections 64 --batch 100
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+
+async def client(host, port, names, requests, batch, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            if batch:
+                path = '/matches'
+                body = {'matches': [random.sample(names, 2) for _ in range(batch)]}
+            else:
+                path = '/match'
+                winner, loser = random.sample(names, 2)
+                body = {'winner': winner, 'loser': loser}
+            payload = json.dumps(body).encode('utf-8')
+            start = time.perf_counter()
+            writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\n\r\n".encode('latin-1') + payload)
+            await writer.drain()
+            status = (await reader.readline()).split()[1]
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            if status != b'200':
+                raise RuntimeError(f"{path} returned {status.decode()}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(host, port, names, connections, requests, batch):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, names, requests, batch, latencies) for _ in range(connections)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def start_local_service(directory, players, snapshot_every=1000):
+    """Start Service.py on a free port over a fresh roster; returns (process, host, port)."""
+    roster = os.path.join(directory, 'player.txt')
+    with open(roster, 'w', encoding='utf-8') as file:
+        for i in range(players):
+            file.write(f"Player{i};1000\n")
+    service = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Service.py')
+    process = subprocess.Popen([sys.executable, service, '--port', '0', '--players', roster,
+                                '--journal', os.path.join(directory, 'player.journal'),
+                                '--snapshot-every', str(snapshot_every)],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()  # "Listening on host:port"
+    host, port = line.split()[-1].rsplit(':', 1)
+    return process, host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test Service.py.")
+    parser.add_argument('--url', help="host:port of a running service (default: start one locally)")
+    parser.add_argument('--players', type=int, default=1000, help="roster size for the local service")
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=500, help="requests per connection")
+    parser.add_argument('--batch', type=int, default=0, help="matches per request via /matches (0: use /match)")
+    parser.add_argument('--snapshot-every', type=int, default=1000, help="passed on to the local service")
+    args = parser.parse_args()
+
+    names = [f"Player{i}" for i in range(args.players)]
+    with tempfile.TemporaryDirectory() as directory:
+        process = None
+        if args.url:
+            host, port = args.url.rsplit(':', 1)
+            port = int(port)
+        else:
+            process, host, port = start_local_service(directory, args.players, args.snapshot_every)
+        try:
+            elapsed, latencies = asyncio.run(run(host, port, names, args.connections, args.requests, args.batch))
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+
+    matches = len(latencies) * (args.batch or 1)
+    print(f"{len(latencies)} requests, {matches} matches in {elapsed:.2f} s")
+    print(f"  {matches / elapsed:,.0f} matches/sec")
+    print(f"  latency p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,300 @@
 from Player import Player
+from Leaderboard import Leaderboard
+from Metrics import logger, registry, timed
+import Journal
+import gc
+import logging
 import os
 
+def elo_update(winner_elo, loser_elo, k=32):  # K-factor of 32 is common in Elo rating systems
+    expected_winner = 1 / (1 + 10 ** ((loser_elo - winner_elo) / 400))
+    expected_loser = 1 / (1 + 10 ** ((winner_elo - loser_elo) / 400))
+
+    new_winner_elo = round(winner_elo + k * (1 - expected_winner))
+    new_loser_elo = round(loser_elo + k * (0 - expected_loser))
+    return new_winner_elo, new_loser_elo
+
+
 class Methods:
-    def __init__(self, filename='player.txt'):
+    def __init__(self, filename='player.txt', journal_filename=None, snapshot_every=1000, history_filename=None):
         self.filename = filename
-        self.players = []
+        self.players = {}  # case-folded name -> Player, kept in sync on add/rename/delete
+        self.leaderboard = Leaderboard()
+        # Every change is appended to the journal; player.txt is rewritten as a
+        # snapshot once snapshot_every events have piled up since the last one.
+        self.journal = Journal.Journal(journal_filename) if journal_filename else None
+        self.snapshot_every = snapshot_every
+        self.store = None  # set when filename is a memory-mapped roster (see Roster.py)
+        self.history = None
+        if history_filename:
+            import History
 
+            self.history = History.History(history_filename)
+
+    @staticmethod
+    def _key(name):
+        return name.lower()
+
+    @timed('load')
     def load_file(self):
-        if os.path.exists(self.filename):
-            with open(self.filename, 'r', encoding='utf-8') as file:
-                for line in file:
-                    name, rating = line.strip().split(';')
-                    self.players.append(Player(name, int(rating)))
-        else:
-            print(f"File {self.filename} does not exist. Starting with an empty list of players.")
+        # Loading allocates one Player (plus index entries) per row and none of
+        # it is garbage, so keep the cyclic collector from rescanning it all
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if os.path.exists(self.filename) and self._is_store():
+                self._load_store()
+            elif os.path.exists(self.filename):
+                with open(self.filename, 'r', encoding='utf-8') as file:
+                    for line in file:
+                        name, rating = line.strip().split(';')
+                        key = self._key(name)
+                        if key in self.players:
+                            self._duplicate(name)
+                            continue
+                        self.players[key] = Player(name, int(rating))
+                self.leaderboard.add_many(self.players.values())
+            else:
+                logger.info("File %s does not exist. Starting with an empty list of players.", self.filename)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        if self.journal:
+            self._replay()
+        if self.history:
+            self.history.load()
+
+    def _is_store(self):
+        with open(self.filename, 'rb') as file:
+            return file.read(7) == b'ELOROST'  # Roster.MAGIC less its version; checked here to keep numpy optional
+
+    def _load_store(self):
+        import Roster
+
+        # Names and ratings stay in the mapped file; players are made on first use
+        self.store = Roster.Store(self.filename)
+        self.players = Roster.Players(self.store)
+        self.leaderboard = Roster.Ranking(self.players)
+
+    def _duplicate(self, name):
+        logger.warning("Player %s appears more than once in %s; keeping the first entry.", name, self.filename)
+
+    def _replay(self):
+        # Records carry absolute ratings, so replaying a tail that the snapshot
+        # already covers (a crash between the two writes) is harmless.
+        journal, self.journal = self.journal, None
+        history, self.history = self.history, None  # already holds these changes
+        for kind, _, names, values in journal.replay():
+            if kind == Journal.ADD:
+                player = self.players.get(self._key(names[0]))
+                if player:
+                    self.set_elo(player, values[0])
+                else:
+                    self.add_player(names[0], values[0])
+            elif kind == Journal.RENAME:
+                player = self.players.get(self._key(names[0]))
+                if player:
+                    self.rename_player(player, names[1])
+            elif kind == Journal.DELETE:
+                player = self.players.get(self._key(names[0]))
+                if player:
+                    self.delete_player(player)
+            elif kind == Journal.SET_ELO:
+                player = self.players.get(self._key(names[0]))
+                if player:
+                    self.set_elo(player, values[1])
+            elif kind == Journal.MATCH:
+                for name, elo in ((names[0], values[1]), (names[1], values[3])):
+                    player = self.players.get(self._key(name))
+                    if player:
+                        self.set_elo(player, elo)
+        self.journal = journal
+        self.history = history
+
+    def _log(self, kind, names, values=(), flush=True):
+        if self.journal:
+            self.journal.append(kind, names, values, flush=False)
+        if flush:
+            self.flush()
 
+    @timed('save')
     def save_file(self):
-        with open(self.filename, 'w', encoding='utf-8') as file:
-            for player in self.players:
-                file.write(f"{player.get_name()};{player.get_elo()}\n")
+        if self.store is not None:
+            import Roster
+
+            self.players = Roster.save(self.players)
+            self.store = self.players.store
+            self.leaderboard = Roster.Ranking(self.players)
+        else:
+            tmp = self.filename + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as file:
+                for player in self.players.values():
+                    file.write(f"{player.get_name()};{player.get_elo()}\n")
+                file.flush()
+                os.fsync(file.fileno())
+            Journal.replace(tmp, self.filename)
+        # Only now that the snapshot is on disk may the journal offset move past it
+        if self.journal:
+            self.journal.mark_snapshot()
+
+    def flush(self):
+        """Push journaled changes to disk and take a snapshot if one is due."""
+        if self.journal:
+            self.journal.flush()
+            if self.journal.since_snapshot >= self.snapshot_every:
+                self.save_file()
+        if self.history:
+            self.history.journal.flush()
+
+    def close(self):
+        if self.journal:
+            self.journal.close()
+        if self.history:
+            self.history.close()
+        if self.store is not None:
+            self.store.close()
 
     def add_player(self, name, rating):
+        key = self._key(name)
+        if key in self.players:
+            logger.warning("Player %s already exists.", name)
+            return None
         new_player = Player(name, rating)
-        self.players.append(new_player)
-        print(f"Added player: {new_player.get_name()} with Elo rating {new_player.get_elo()}")
+        self.players[key] = new_player
+        self.leaderboard.add(new_player)
+        self._log(Journal.ADD, [name], [rating])
+        registry.inc('players_added')
+        logger.debug("Added player: %s with Elo rating %s", name, rating)
+        return new_player
+
+    def rename_player(self, player, new_name):
+        old_key = self._key(player.get_name())
+        new_key = self._key(new_name)
+        if new_key != old_key and new_key in self.players:
+            logger.warning("Player %s already exists.", new_name)
+            return False
+        old_name = player.get_name()
+        del self.players[old_key]
+        player.set_name(new_name)
+        self.players[new_key] = player
+        if new_name != old_name:
+            self._log(Journal.RENAME, [old_name, new_name])
+            if self.history:
+                self.history.rename(old_name, new_name)
+        return True
+
+    def delete_player(self, player):
+        del self.players[self._key(player.get_name())]
+        self.leaderboard.remove(player)
+        self._log(Journal.DELETE, [player.get_name()])
+        if self.history:
+            self.history.forget(player.get_name())
+
+    def set_elo(self, player, elo, log=True, flush=True):
+        # Route rating changes through here so the leaderboard stays ordered
+        old_elo = player.get_elo()
+        self.leaderboard.set_elo(player, elo)
+        if log and elo != old_elo:
+            self._log(Journal.SET_ELO, [player.get_name()], [old_elo, elo], flush)
 
     def list_players(self):
-        self.players.sort(reverse=True)
+        if not logger.isEnabledFor(logging.INFO):
+            return  # nobody would see the listing, so don't build it
         count = 0
-        for player in self.players:
+        for player in self.leaderboard.top():
             count += 1
-            print(f"{count}. {player.get_name()} : {player.get_elo()}")
+            logger.info("%d. %s : %d", count, player.get_name(), player.get_elo())
 
-    def calculate_elo(self, winner, loser):
-        k = 32  # K-factor, common in Elo rating systems
+    @timed('match_update')
+    def calculate_elo(self, winner, loser, k=32, flush=True):
         winner_elo = winner.get_elo()
         loser_elo = loser.get_elo()
+        new_winner_elo, new_loser_elo = elo_update(winner_elo, loser_elo, k)
+
+        self.set_elo(winner, new_winner_elo, log=False)
+        self.set_elo(loser, new_loser_elo, log=False)
+        if self.history:
+            self.history.record_match(winner.get_name(), loser.get_name(),
+                                      winner_elo, new_winner_elo, loser_elo, new_loser_elo, flush=False)
+        self._log(Journal.MATCH, [winner.get_name(), loser.get_name()],
+                  [winner_elo, new_winner_elo, loser_elo, new_loser_elo], flush)
+
+        registry.inc('matches')
+        logger.debug("%s wins! New Elo: %d", winner.get_name(), new_winner_elo)
+        logger.debug("%s loses! New Elo: %d", loser.get_name(), new_loser_elo)
+
+    @timed('batch_update')
+    def record_matches(self, players, winners, losers, k=32, simultaneous=False):
+        """Rate a batch of games given as index arrays into the list players.
+
+        The caller supplies players because the order of self.players is not
+        stable (a rename moves the player to the end). With simultaneous
+        set, all games are rated against the ratings from before the batch
+        (a rating period) instead of one after another; only sequential
+        batches are added to the match history.
+        """
+        import Batch  # numpy is only needed for batch ingestion
+
+        games = [] if self.history else None
+        indexes, old, new = Batch.record_matches(players, winners, losers, k, simultaneous, games)
+        if self.journal:
+            for w, l in zip(winners, losers):
+                self.journal.append(Journal.RESULT, [players[w].get_name(), players[l].get_name()], flush=False)
+        changed = old != new
+        for i, elo in zip(indexes[changed].tolist(), new[changed].tolist()):
+            self.set_elo(players[i], elo, flush=False)
+        registry.inc('matches', len(winners))
+        for w, l, winner_old, winner_new, loser_old, loser_new in games or ():
+            self.history.record_match(players[w].get_name(), players[l].get_name(),
+                                      winner_old, winner_new, loser_old, loser_new, flush=False)
+        self.flush()
 
-        expected_winner = 1 / (1 + 10 ** ((loser_elo - winner_elo) / 400))
-        expected_loser = 1 / (1 + 10 ** ((winner_elo - loser_elo) / 400))
+    def record_results(self, results, k=32, simultaneous=False):
+        """Rate (winner name, loser name) pairs as one batch; returns the pairs that were skipped."""
+        players = []  # just the players in this batch
+        positions = {}  # id(player) -> index into players
+        winners = []
+        losers = []
+        skipped = []
+        for winner_name, loser_name in results:
+            winner = self.players.get(self._key(winner_name))
+            loser = self.players.get(self._key(loser_name))
+            if winner is None or loser is None:
+                logger.warning("Skipping %s vs %s: player not found.", winner_name, loser_name)
+                skipped.append((winner_name, loser_name))
+                continue
+            if winner is loser:
+                logger.warning("Skipping %s vs %s: same player.", winner_name, loser_name)
+                skipped.append((winner_name, loser_name))
+                continue
+            for player in (winner, loser):
+                if id(player) not in positions:
+                    positions[id(player)] = len(players)
+                    players.append(player)
+            winners.append(positions[id(winner)])
+            losers.append(positions[id(loser)])
+        if winners:
+            self.record_matches(players, winners, losers, k, simultaneous)
+        return skipped
 
-        new_winner_elo = round(winner_elo + k * (1 - expected_winner))
-        new_loser_elo = round(loser_elo + k * (0 - expected_loser))
+    def record_results_csv(self, filename, k=32, simultaneous=False):
+        import Batch
 
-        winner.set_elo(new_winner_elo)
-        loser.set_elo(new_loser_elo)
+        return self.record_results(Batch.load_results_csv(filename), k, simultaneous)
 
-        print(f"{winner.get_name()} wins! New Elo: {winner.get_elo()}")
-        print(f"{loser.get_name()} loses! New Elo: {loser.get_elo()}")
+    def delete_match(self, match_id, k=32):
+        """Remove a mis-entered match from the history and apply the recomputed ratings."""
+        if self.history is None:
+            raise RuntimeError("Match history is disabled; pass history_filename to Methods")
+        for name, elo in self.history.delete_match(match_id, k).items():
+            player = self.players.get(self._key(name))
+            if player:
+                self.set_elo(player, elo)
 
+    @timed('lookup')
     def find_player(self, name):
-        for player in self.players:
-            if player.get_name().lower() == name.lower():
-                return player
-        print(f"Player {name} not found.")
-        return None
\ No newline at end of file
+        player = self.players.get(self._key(name))
+        if player is None:
+            registry.inc('lookup_misses')
+            logger.debug("Player %s not found.", name)
+        return player
@@ -0,0 +1,156 @@
+# Metrics.py
+# Counters, latency histograms and opt-in profiling for the rating core.
+#
+#   import Metrics
+#   Metrics.registry.dump('metrics.json')   # or 'metrics.prom' for Prometheus text
+#
+# Set ELO_PROFILE=<file> to run EloApp or Service.py under cProfile and
+# tracemalloc; the profile goes to <file> and the top allocations to the log.
+# EloApp also dumps the metrics on exit to ELO_METRICS=<file> if it is set.
+
+import functools
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+logger = logging.getLogger('elo')
+
+# Upper bounds in seconds, from a dict lookup to a full save of a large roster
+BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+class Registry:
+    def __init__(self):
+        self.enabled = True
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        if self.enabled:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def timed(self, name):
+        """Decorator recording the call count and latency of a function under name."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        self.counters.clear()
+        self.histograms.clear()
+
+    def to_dict(self):
+        return {
+            'counters': dict(self.counters),
+            'histograms': {
+                name: {'count': h.count, 'sum': h.sum, 'p50': h.quantile(0.5), 'p99': h.quantile(0.99),
+                       'buckets': dict(zip([str(bound) for bound in h.buckets] + ['+Inf'], h.counts))}
+                for name, h in self.histograms.items()
+            },
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE elo_{name}_total counter")
+            lines.append(f"elo_{name}_total {value}")
+        for name, h in sorted(self.histograms.items()):
+            lines.append(f"# TYPE elo_{name}_seconds histogram")
+            cumulative = 0
+            for bound, count in zip(h.buckets, h.counts):
+                cumulative += count
+                lines.append(f'elo_{name}_seconds_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'elo_{name}_seconds_bucket{{le="+Inf"}} {h.count}')
+            lines.append(f"elo_{name}_seconds_sum {h.sum}")
+            lines.append(f"elo_{name}_seconds_count {h.count}")
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, filename):
+        """Write the metrics as JSON (for a .json filename) or Prometheus text."""
+        text = self.to_json() if filename.endswith('.json') else self.to_prometheus()
+        with open(filename, 'w', encoding='utf-8') as file:
+            file.write(text)
+
+
+registry = Registry()
+timed = registry.timed
+
+
+@contextmanager
+def profiling(filename, top=20):
+    """Run the block under cProfile and tracemalloc.
+
+    The profile is written to filename (open it with pstats or snakeviz) and
+    the top allocation sites are logged at INFO.
+    """
+    import cProfile
+    import tracemalloc
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        profiler.dump_stats(filename)
+        for stat in snapshot.statistics('lineno')[:top]:
+            logger.info("alloc %s", stat)
+
+
+@contextmanager
+def profiling_from_env():
+    """profiling() if ELO_PROFILE names an output file, otherwise nothing."""
+    filename = os.environ.get('ELO_PROFILE')
+    if not filename:
+        yield None
+        return
+    with profiling(filename) as profiler:
+        yield profiler
@@ -1,6 +1,8 @@
 # Player.py
 
 class Player:
+    __slots__ = ('name', 'rating')
+
     def __init__(self, name, rating):
         self.name = name
         self.rating = rating
@@ -18,11 +20,11 @@ class Player:
         self.name = name
 
     def swap_cont(self, name1, elo1):
-        self.rating = elo1
-        self.name = name1
+        self.set_elo(elo1)
+        self.set_name(name1)
 
     def __lt__(self, other):
-        return self.rating < other.rating
+        return self.get_elo() < other.get_elo()
 
     def __eq__(self, other):
-        return self.name == other.name
\ No newline at end of file
+        return self.get_name() == other.get_name()
@@ -0,0 +1,469 @@
+# Roster.py
+# Memory-mapped columnar roster file, an alternative to the name;rating text format.
+#
+# Layout: header, then three columns with one entry per player (where its
+# name starts in the name table, plus one end offset; its rating; the rows
+# sorted by case-folded name, for lookups), then the UTF-8 name table with
+# the names separated by newlines.
+#
+# Loading maps the file and ranks the rating column once with numpy; a
+# StoredPlayer is only created for a row when something asks for it.
+
+import heapq
+import os
+import struct
+import sys
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
+import numpy as np
+
+import Journal
+from Leaderboard import Leaderboard
+from Player import Player
+
+MAGIC = b'ELOROST2'
+HEADER = struct.Struct('<8sQQ')  # magic, player count, name table size
+
+
+def is_store(filename):
+    with open(filename, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def _map(filename, dtype, offset, count):
+    if not count:
+        return np.zeros(0, dtype=dtype)  # mmap refuses empty ranges
+    return np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=(count,))
+
+
+class Store:
+    """A roster file mapped read-only; nothing is parsed until it is asked for.
+
+    Changes are kept by the StoredPlayer they concern until the roster is
+    saved again, so the mapped columns always hold the file as written.
+    """
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as file:
+            magic, count, names_size = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a version 2 roster file; convert it again from text")
+        self.filename = filename
+        self.count = count
+        position = HEADER.size
+        self.offsets = _map(filename, '<u8', position, count + 1)
+        position += 8 * (count + 1)
+        self.ratings = _map(filename, '<i4', position, count)
+        position += 4 * count
+        self.name_order = _map(filename, '<u4', position, count)
+        position += 4 * count
+        self.name_table = _map(filename, np.uint8, position, names_size)
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        """Unmap the file; Windows will not replace or delete it while it is mapped."""
+        arrays = (self.offsets, self.ratings, self.name_order, self.name_table)
+        mmaps = [getattr(array, '_mmap', None) for array in arrays]
+        self.offsets = self.ratings = self.name_order = self.name_table = None
+        for mm in mmaps:
+            if mm is not None:
+                mm.close()  # BufferError if a view of the old mapping is still alive
+
+    def name(self, index):
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1]) - 1
+        return self.name_table[start:end].tobytes().decode('utf-8')
+
+    def names(self):
+        if not self.count:
+            return []
+        return self.name_table.tobytes().decode('utf-8').split('\n')
+
+    def _folded(self, i):
+        return self.name(int(self.name_order[i])).lower()
+
+    def find(self, key):
+        """The row named key (case-folded), or None."""
+        i = bisect_left(range(self.count), key, key=self._folded)
+        if i < self.count and self._folded(i) == key:
+            return int(self.name_order[i])
+        return None
+
+    def prefixed(self, prefix):
+        """The rows whose case-folded name starts with prefix, in name order."""
+        def head(i):
+            return self._folded(i)[:len(prefix)]
+
+        start = bisect_left(range(self.count), prefix, key=head)
+        end = bisect_right(range(self.count), prefix, lo=start, key=head)
+        return self.name_order[start:end]
+
+
+class StoredPlayer(Player):
+    """A Player read from a Store row; name and rating are copied in only once changed."""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def get_elo(self):
+        try:
+            return self.rating
+        except AttributeError:
+            return int(self.store.ratings[self.index])
+
+    def get_name(self):
+        try:
+            return self.name
+        except AttributeError:
+            return self.store.name(self.index)
+
+
+class Players:
+    """The case-folded name -> Player mapping Methods keeps, answered from a Store.
+
+    Rows are looked up through the file's name index and get their
+    StoredPlayer the first time they are used. Players added or renamed
+    since the file was written are kept in ``extra``; the rows of deleted
+    and renamed players are in ``hidden``.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.loaded = {}  # row -> its StoredPlayer, once used
+        self.extra = {}  # key -> Player not (or no longer) under its row
+        self.hidden = set()  # rows that no longer belong to their name
+
+    def row(self, index):
+        player = self.loaded.get(index)
+        if player is None:
+            player = self.loaded[index] = StoredPlayer(self.store, index)
+        return player
+
+    def get(self, key, default=None):
+        player = self.extra.get(key)
+        if player is not None:
+            return player
+        index = self.store.find(key)
+        if index is None or index in self.hidden:
+            return default
+        return self.row(index)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        player = self.get(key)
+        if player is None:
+            raise KeyError(key)
+        return player
+
+    def __setitem__(self, key, player):
+        self.extra[key] = player
+
+    def __delitem__(self, key):
+        if self.extra.pop(key, None) is not None:
+            return
+        index = self.store.find(key)
+        if index is None or index in self.hidden:
+            raise KeyError(key)
+        self.hidden.add(index)
+
+    def __len__(self):
+        return self.store.count - len(self.hidden) + len(self.extra)
+
+    def items(self):
+        """Every (key, player) pair; this creates a StoredPlayer for every row."""
+        for index in range(self.store.count):
+            if index not in self.hidden:
+                player = self.row(index)
+                yield player.get_name().lower(), player
+        yield from list(self.extra.items())
+
+    def __iter__(self):
+        return (key for key, _ in self.items())
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (player for _, player in self.items())
+
+    def search(self, prefix, limit):
+        """The limit best-rated players whose key starts with prefix, and how many match.
+
+        Safe to call from another thread: the shared collections are copied
+        in single calls before use.
+        """
+        rows = self.store.prefixed(prefix).astype(np.int64)
+        hidden = list(self.hidden)
+        if hidden:
+            rows = rows[~np.isin(rows, hidden)]
+        ratings = self.store.ratings[rows].astype(np.int64)
+        loaded = dict(self.loaded)
+        for i in np.flatnonzero(np.isin(rows, list(loaded))).tolist():
+            ratings[i] = loaded[int(rows[i])].get_elo()  # re-rated since the file was written
+        extra = [player for key, player in list(self.extra.items()) if key.startswith(prefix)]
+        best = np.argsort(-ratings, kind='stable')[:limit]
+        players = [self.row(int(rows[i])) for i in best.tolist()] + extra
+        players.sort(key=lambda player: -player.get_elo())
+        return players[:limit], len(rows) + len(extra)
+
+
+class Ranking:
+    """The Leaderboard interface over a Store without an entry per row.
+
+    The file's rows are ranked once by ``np.argsort(-ratings)`` (ties in row
+    order). A player whose rating changes, or who was added since, moves
+    into ``moved``, an ordinary Leaderboard whose seq starts after the last
+    row so ties still go to the older entry; the position they left is
+    recorded in ``dead``. rank and slice merge the two orders.
+    """
+
+    def __init__(self, players):
+        self.players = players
+        self.store = players.store
+        self.order = np.argsort(-self.store.ratings, kind='stable').astype(np.uint32)
+        self.dead = []  # sorted positions in self.order that are no longer ranked there
+        self.moved = Leaderboard()
+        self.moved.seq = self.store.count
+        for index in players.hidden:
+            insort(self.dead, self._position(index))
+        for player in players.extra.values():
+            self.moved.add(player)
+
+    def _key(self, position):
+        index = int(self.order[position])
+        return -int(self.store.ratings[index]), index
+
+    def _position(self, index):
+        return bisect_left(range(len(self.order)), (-int(self.store.ratings[index]), index), key=self._key)
+
+    def _live_before(self, position):
+        return position - bisect_left(self.dead, position)
+
+    def _is_dead(self, position):
+        i = bisect_left(self.dead, position)
+        return i < len(self.dead) and self.dead[i] == position
+
+    def _before(self, position):
+        """How many ranked entries sort before file position position."""
+        return self._live_before(position) + self.moved.count_before(self._key(position))
+
+    def _base_position(self, player):
+        """player's position in the file order, or None if it is not ranked there."""
+        if not isinstance(player, StoredPlayer) or player.store is not self.store or player in self.moved:
+            return None
+        position = self._position(player.index)
+        return None if self._is_dead(position) else position
+
+    def _rows_from(self, position):
+        d = bisect_left(self.dead, position)
+        for p in range(position, len(self.order)):
+            if d < len(self.dead) and self.dead[d] == p:
+                d += 1
+                continue
+            yield self._key(p)
+
+    def __len__(self):
+        return len(self.order) - len(self.dead) + len(self.moved)
+
+    def __contains__(self, player):
+        return player in self.moved or self._base_position(player) is not None
+
+    def add(self, player):
+        self.moved.add(player)
+
+    def remove(self, player):
+        if player in self.moved:
+            self.moved.remove(player)
+            return
+        position = self._base_position(player)
+        if position is None:
+            raise KeyError(id(player))
+        insort(self.dead, position)
+
+    def set_elo(self, player, elo):
+        self.remove(player)
+        player.set_elo(elo)
+        self.moved.add(player)
+
+    def rank(self, player):
+        if player in self.moved:
+            entry = self.moved.keys[id(player)]
+            ahead = bisect_left(range(len(self.order)), entry[:2], key=self._key)
+            return self._live_before(ahead) + self.moved.rank(player)
+        position = self._base_position(player)
+        if position is None:
+            raise KeyError(id(player))
+        return self._before(position) + 1
+
+    def top(self, k=None):
+        return self.slice(0, len(self) if k is None else k)
+
+    def page(self, p, size=50):
+        return self.slice(p * size, size)
+
+    def slice(self, start, count):
+        """The count players from rank start + 1 onwards."""
+        # The last file position with no more than start entries in front of it
+        b = bisect_right(range(len(self.order)), start, key=self._before) - 1
+        if b < 0:
+            base, moved = 0, start
+        else:
+            skip = start - self._before(b)
+            live = not self._is_dead(b)
+            moved = self.moved.count_before(self._key(b))
+            if skip < live:
+                base = b
+            else:
+                base, moved = b + 1, moved + skip - live
+        players = []
+        for entry in islice(heapq.merge(self._rows_from(base), self.moved.entries(moved)), count):
+            players.append(self.players.row(entry[1]) if len(entry) == 2 else entry[2])
+        return players
+
+
+def _offsets(lengths):
+    """Name table offsets from the name lengths, each counting its separator."""
+    offsets = np.zeros(len(lengths) + 1, dtype='<u8')
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _dump(filename, offsets, ratings, order, pieces):
+    """Write the columns and the name table (pieces joined by newlines) to a synced temporary file."""
+    count = len(ratings)
+    tmp = filename + '.tmp'
+    with open(tmp, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, count, int(offsets[-1]) - 1 if count else 0))
+        for column, dtype in ((offsets, '<u8'), (ratings, '<i4'), (order, '<u4')):
+            file.write(np.ascontiguousarray(column.astype(dtype, copy=False)))
+        for i, piece in enumerate(pieces):
+            if i:
+                file.write(b'\n')
+            file.write(piece)
+        file.flush()
+        os.fsync(file.fileno())
+    return tmp
+
+
+def _write(filename, players):
+    by_key = {}
+    for player in players:
+        by_key.setdefault(player.get_name().lower(), player)  # the first of a duplicated name wins
+    keys = list(by_key)
+    players = list(by_key.values())
+    names = [player.get_name().encode('utf-8') for player in players]
+    ratings = np.array([player.get_elo() for player in players], dtype='<i4')
+    order = np.array(sorted(range(len(keys)), key=keys.__getitem__), dtype='<u4')
+    offsets = _offsets(np.array([len(name) + 1 for name in names], dtype=np.uint64))
+    return _dump(filename, offsets, ratings, order, [b'\n'.join(names)])
+
+
+def write(filename, players):
+    """Write players to filename as a roster file, replacing it atomically."""
+    Journal.replace(_write(filename, players), filename)
+
+
+def _write_changes(players):
+    """Write the roster players (a Players) describes; returns the temp file and (row, player) pairs."""
+    store = players.store
+    hidden = np.array(sorted(players.hidden), dtype=np.int64)
+    live = np.ones(store.count, dtype=bool)
+    live[hidden] = False
+    kept = store.count - len(hidden)
+    extra = sorted(players.extra.items(), key=lambda item: item[0])
+    names = [player.get_name().encode('utf-8') for _, player in extra]
+
+    ratings = np.empty(kept + len(extra), dtype='<i4')
+    ratings[:kept] = store.ratings[live]
+    ratings[kept:] = [player.get_elo() for _, player in extra]
+    placed = [(kept + i, player) for i, (_, player) in enumerate(extra)]
+    for index, player in players.loaded.items():
+        if live[index]:
+            row = index - bisect_left(hidden, index)
+            ratings[row] = player.get_elo()
+            placed.append((row, player))
+
+    lengths = np.diff(store.offsets)[live]
+    offsets = _offsets(np.concatenate([lengths, np.array([len(name) + 1 for name in names], dtype=np.uint64)]))
+
+    old_order = store.name_order[live[store.name_order]]
+    at = [bisect_left(range(len(old_order)), key, key=lambda i: store.name(int(old_order[i])).lower())
+          for key, _ in extra]
+    order = old_order - np.searchsorted(hidden, old_order).astype(np.uint32) if len(hidden) else old_order
+    order = np.insert(order, at, np.arange(kept, len(ratings), dtype=np.uint32))
+
+    # Names of the rows kept, copied a run of consecutive rows at a time
+    pieces = []
+    start = 0
+    for stop in hidden.tolist() + [store.count]:
+        if stop > start:
+            pieces.append(store.name_table[int(store.offsets[start]):int(store.offsets[stop]) - 1])
+        start = stop + 1
+    return _dump(store.filename, offsets, ratings, order, pieces + names), placed
+
+
+def save(players):
+    """Rewrite the file under players (a Players) and return a Players over it reopened.
+
+    StoredPlayers are rebound to their rows in the new file, so callers keep
+    the same objects; players added since are carried over as they are.
+    """
+    store = players.store
+    tmp, placed = _write_changes(players)
+    for index, player in players.loaded.items():
+        if index in players.hidden and player.store is store:
+            # Dropped from the roster: keep working once the old file is unmapped
+            player.set_name(player.get_name())
+            player.set_elo(player.get_elo())
+    store.close()
+    Journal.replace(tmp, store.filename)
+    reopened = Players(Store(store.filename))
+    for index, player in placed:
+        if isinstance(player, StoredPlayer):
+            player.store = reopened.store
+            player.index = index
+            for attribute in ('name', 'rating'):
+                try:
+                    delattr(player, attribute)  # now in the new file
+                except AttributeError:
+                    pass
+            reopened.loaded[index] = player
+        else:
+            reopened.extra[player.get_name().lower()] = player
+            reopened.hidden.add(index)
+    return reopened
+
+
+def read_text(filename):
+    players = []
+    with open(filename, 'r', encoding='utf-8') as file:
+        for line in file:
+            name, rating = line.strip().split(';')
+            players.append(Player(name, int(rating)))
+    return players
+
+
+def convert(text_filename, store_filename):
+    write(store_filename, read_text(text_filename))
+
+
+def export(store_filename, text_filename):
+    store = Store(store_filename)
+    with open(text_filename, 'w', encoding='utf-8') as file:
+        for name, rating in zip(store.names(), store.ratings.tolist()):
+            file.write(f"{name};{rating}\n")
+    store.close()
+
+
+if __name__ == "__main__":
+    # python Roster.py convert player.txt player.elo
+    # python Roster.py export player.elo player.txt
+    command, source, target = sys.argv[1:4]
+    {'convert': convert, 'export': export}[command](source, target)
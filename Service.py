@@ -0,0 +1,220 @@
+# Service.py
+# Headless HTTP/JSON front end to Methods for match servers.
+#
+#   python Service.py --port 8080 --players player.txt --journal player.journal
+#
+#   POST /match    {"winner": "Ann", "loser": "Bob"}
+#   POST /matches  {"matches": [["Ann", "Bob"], ...], "simultaneous": false}
+#   GET  /player/<name>
+#   GET  /rank/<name>
+#   GET  /top?k=10&page=0
+#   GET  /metrics          (Prometheus text; /metrics.json for JSON)
+
+import argparse
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import Metrics
+from Methods import Methods
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class RatingService:
+    """Serves rating lookups and applies submitted results through one writer task.
+
+    Every rating change goes through self.queue and is applied by _writer in
+    submission order, so two results touching the same player can never
+    interleave. The writer drains whatever is queued before flushing the
+    journal once for the whole group; results are only handed back once
+    that flush succeeded. Reads are answered straight away.
+    """
+
+    def __init__(self, methods, k=32):
+        self.methods = methods
+        self.k = k
+        self.queue = asyncio.Queue()
+        self.writer = None
+
+    async def start(self, host, port):
+        self.writer = asyncio.create_task(self._writer())
+        return await asyncio.start_server(self._serve, host, port)
+
+    async def _writer(self):
+        while True:
+            jobs = [await self.queue.get()]
+            while not self.queue.empty():
+                jobs.append(self.queue.get_nowait())
+            outcomes = []
+            for job, future in jobs:
+                try:
+                    outcomes.append((future, job(), None))
+                except Exception as error:
+                    outcomes.append((future, None, error))
+            try:
+                self.methods.flush()
+            except Exception as error:
+                # Keep serving: fail this group and let the next flush retry
+                Metrics.logger.exception("Flushing the journal failed")
+                outcomes = [(future, None, error) for future, _, _ in outcomes]
+            for future, result, error in outcomes:
+                if future.done():  # the client went away
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    async def submit(self, job):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((job, future))
+        return await future
+
+    def _player(self, name):
+        player = self.methods.players.get(self.methods._key(name))
+        if player is None:
+            raise HTTPError(404, f"Player {name} not found")
+        return player
+
+    def _describe(self, player):
+        return {'name': player.get_name(), 'rating': player.get_elo(), 'rank': self.methods.leaderboard.rank(player)}
+
+    def _record_match(self, winner_name, loser_name):
+        winner = self._player(winner_name)
+        loser = self._player(loser_name)
+        if winner is loser:
+            raise HTTPError(400, "Winner and loser must be different players")
+        self.methods.calculate_elo(winner, loser, self.k, flush=False)
+        return {'winner': self._describe(winner), 'loser': self._describe(loser)}
+
+    def _record_matches(self, matches, simultaneous):
+        skipped = self.methods.record_results(matches, self.k, simultaneous)
+        return {'recorded': len(matches) - len(skipped), 'skipped': skipped}
+
+    async def handle(self, method, path, body):
+        url = urlsplit(path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        if method == 'POST' and parts == ['match']:
+            data = self._json(body)
+            return await self.submit(lambda: self._record_match(str(data['winner']), str(data['loser'])))
+        if method == 'POST' and parts == ['matches']:
+            data = self._json(body)
+            matches = [(str(winner), str(loser)) for winner, loser in data['matches']]
+            return await self.submit(lambda: self._record_matches(matches, bool(data.get('simultaneous'))))
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'player':
+            return self._describe(self._player(parts[1]))
+        if method == 'GET' and len(parts) == 2 and parts[0] == 'rank':
+            player = self._player(parts[1])
+            return {'name': player.get_name(), 'rank': self.methods.leaderboard.rank(player)}
+        if method == 'GET' and parts == ['top']:
+            query = parse_qs(url.query)
+            k = int(query.get('k', ['10'])[0])
+            page = int(query.get('page', ['0'])[0])
+            if k <= 0 or page < 0:
+                raise HTTPError(400, "k must be positive and page non-negative")
+            players = self.methods.leaderboard.page(page, k)
+            return [{'rank': page * k + i + 1, 'name': player.get_name(), 'rating': player.get_elo()}
+                    for i, player in enumerate(players)]
+        if method == 'GET' and parts == ['metrics.json']:
+            return Metrics.registry.to_dict()
+        if method == 'GET' and parts == ['metrics']:
+            return Metrics.registry.to_prometheus()
+        if parts[0] in ('match', 'matches', 'player', 'rank', 'top', 'metrics', 'metrics.json'):
+            raise HTTPError(405, f"{method} not allowed on {url.path}")
+        raise HTTPError(404, f"No route for {url.path}")
+
+    @staticmethod
+    def _json(body):
+        try:
+            return json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                try:
+                    status, result = 200, await self.handle(method, path, body)
+                except HTTPError as error:
+                    status, result = error.status, {'error': str(error)}
+                except (KeyError, TypeError, ValueError) as error:
+                    status, result = 400, {'error': f"Bad request: {error}"}
+                except Exception as error:
+                    status, result = 500, {'error': str(error)}
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                if isinstance(result, str):
+                    payload, content_type = result.encode('utf-8'), 'text/plain; version=0.0.4'
+                else:
+                    payload, content_type = json.dumps(result).encode('utf-8'), 'application/json'
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: {content_type}\r\n"
+                             f"Content-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(methods, host, port, k=32):
+    service = RatingService(methods, k)
+    server = await service.start(host, port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"Listening on {host}:{port}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ratings over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--players', default='player.txt')
+    parser.add_argument('--journal', default='player.journal')
+    parser.add_argument('--history')
+    parser.add_argument('--snapshot-every', type=int, default=1000,
+                        help="journal records between rewrites of the roster file")
+    parser.add_argument('--k', type=int, default=32)
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    methods = Methods(args.players, journal_filename=args.journal, snapshot_every=args.snapshot_every,
+                      history_filename=args.history)
+    methods.load_file()
+    try:
+        with Metrics.profiling_from_env():
+            asyncio.run(serve(methods, args.host, args.port, args.k))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        methods.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# StartupBench.py
+# Measure EloApp start-up: import cost from python -X importtime, time to the
+# first window paint and time until the roster is on screen.
+#
+#   python StartupBench.py                       # run EloApp.py from source
+#   python StartupBench.py --exe dist/EloApp/EloApp
+#   python StartupBench.py --max-first-paint 0.5 # exit 1 if slower
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def run_once(command, cwd):
+    # EloApp appends "<event> <seconds>" lines to the file named after --startup-bench
+    with tempfile.TemporaryDirectory() as directory:
+        report = os.path.join(directory, 'startup.txt')
+        start = time.perf_counter()
+        result = subprocess.run(command + [report], cwd=cwd, capture_output=True, text=True, timeout=120)
+        wall = time.perf_counter() - start
+        if result.returncode:
+            raise RuntimeError(f"{' '.join(command)} failed:\n{result.stderr}")
+        if not os.path.exists(report):
+            raise RuntimeError(f"{' '.join(command)} wrote no start-up report")
+        with open(report, 'r', encoding='utf-8') as file:
+            events = dict(line.split() for line in file if line.strip())
+    return wall, {event: float(seconds) for event, seconds in events.items()}, result.stderr
+
+
+def slowest_imports(importtime, count=10):
+    """(cumulative us, module) for the top-level imports that cost the most."""
+    imports = []
+    for line in importtime.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):  # nested imports are indented past the first space
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EloApp start-up.")
+    parser.add_argument('--exe', help="frozen EloApp to time instead of EloApp.py")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-first-paint', type=float, help="fail if the median first paint is slower (s)")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    if args.exe:
+        command = [os.path.abspath(args.exe), '--startup-bench']
+    else:
+        command = [sys.executable, '-X', 'importtime', os.path.join(here, 'EloApp.py'), '--startup-bench']
+
+    runs = [run_once(command, os.getcwd()) for _ in range(args.runs)]
+    median = lambda values: sorted(values)[len(values) // 2]
+    first_paint = median([events['first_paint'] for _, events, _ in runs])
+    print(f"median of {args.runs} runs")
+    print(f"  process wall time: {median([wall for wall, _, _ in runs]):.3f} s")
+    print(f"  first paint:       {first_paint:.3f} s")
+    print(f"  roster loaded:     {median([events['roster_loaded'] for _, events, _ in runs]):.3f} s")
+
+    if not args.exe:
+        print("slowest top-level imports (cumulative, last run)")
+        for cumulative, name in slowest_imports(runs[-1][2]):
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if args.max_first_paint is not None and first_paint > args.max_first_paint:
+        print(f"first paint {first_paint:.3f} s is over the {args.max_first_paint:.3f} s budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
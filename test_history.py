@@ -0,0 +1,121 @@
+# test_history.py
+# Match history queries and recomputation.  Run with `pytest`.
+
+import random
+from datetime import datetime
+
+import pytest
+
+import History
+import Journal
+from Methods import elo_update
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Journal timestamps that are 1000.0, 1010.0, 1020.0, ... in call order."""
+    times = iter(range(1000, 10 ** 9, 10))
+    monkeypatch.setattr(Journal.time, 'time', lambda: float(next(times)))
+
+
+def new_history(tmp_path):
+    history = History.History(str(tmp_path / 'player.history'))
+    history.load()
+    return history
+
+
+def play(history, ratings, winner, loser, k=32):
+    new_winner, new_loser = elo_update(ratings[winner], ratings[loser], k)
+    history.record_match(winner, loser, ratings[winner], new_winner, ratings[loser], new_loser)
+    ratings[winner], ratings[loser] = new_winner, new_loser
+
+
+def from_scratch(initial, games, k=32):
+    """Current ratings and peaks from replaying games over the initial ratings."""
+    ratings = dict(initial)
+    peaks = {}
+    for winner, loser in games:
+        for player in (winner, loser):
+            peaks.setdefault(player, ratings[player])
+        ratings[winner], ratings[loser] = elo_update(ratings[winner], ratings[loser], k)
+        for player in (winner, loser):
+            peaks[player] = max(peaks[player], ratings[player])
+    return {player: ratings[player] for player in peaks}, peaks
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_delete_match_matches_a_replay_from_scratch(tmp_path, seed):
+    rng = random.Random(seed)
+    names = [f"P{i}" for i in range(8)]
+    initial = {name: rng.randrange(900, 1300) for name in names}
+    ratings = dict(initial)
+    history = new_history(tmp_path)
+    games = []
+    for _ in range(120):
+        winner, loser = rng.sample(names, 2)
+        play(history, ratings, winner, loser)
+        games.append((winner, loser))
+
+    live = list(range(len(games)))
+    for _ in range(15):
+        index = live.pop(rng.randrange(len(live)))
+        history.delete_match(index)
+        current, peaks = from_scratch(initial, [games[i] for i in live])
+        for name in names:
+            player = history.ids[name.lower()]
+            assert history.current[player] == current.get(name, initial[name])
+            assert history.peak(name) == peaks.get(name)
+
+    # The rewritten file loads back to the same ratings (ids are handed out afresh)
+    reloaded = new_history(tmp_path)
+    for name, rating in current.items():
+        assert reloaded.current[reloaded.ids[name.lower()]] == rating
+        assert reloaded.peak(name) == peaks[name]
+
+
+def test_delete_match_reports_changed_ratings(tmp_path):
+    history = new_history(tmp_path)
+    ratings = {'Ann': 1000, 'Bob': 1000, 'Cy': 1000}
+    play(history, ratings, 'Ann', 'Bob')
+    play(history, ratings, 'Bob', 'Cy')
+    changed = history.delete_match(0)
+    assert changed == {'Ann': 1000, 'Bob': 1016, 'Cy': 984}
+    with pytest.raises(ValueError):
+        history.delete_match(0)
+
+
+def test_rating_at(tmp_path, clock):
+    history = new_history(tmp_path)
+    ratings = {'Ann': 1000, 'Bob': 1100}
+    play(history, ratings, 'Ann', 'Bob')  # t=1000
+    after_first = ratings['Ann']
+    play(history, ratings, 'Bob', 'Ann')  # t=1010
+
+    assert history.rating_at('Ann', 999) == 1000  # before any match: the starting rating
+    assert history.rating_at('ann', 1000) == after_first
+    assert history.rating_at('Ann', 1005) == after_first  # between the two matches
+    assert history.rating_at('Ann', datetime.fromtimestamp(2000)) == ratings['Ann']
+    assert history.rating_at('Nobody', 1005) is None
+
+
+def test_rename_and_forget_survive_a_reload(tmp_path, clock):
+    history = new_history(tmp_path)
+    ratings = {'Ann': 1000, 'Bob': 1000, 'Cy': 1000}
+    play(history, ratings, 'Ann', 'Bob')
+    history.rename('Ann', 'Anna')
+    ratings['Anna'] = ratings.pop('Ann')
+    play(history, ratings, 'Anna', 'Cy')
+    history.forget('Bob')
+    history.close()
+
+    reloaded = new_history(tmp_path)
+    assert [match[2:4] for match in reloaded.player_matches('Anna')] == [('Anna', 'Bob'), ('Anna', 'Cy')]
+    assert reloaded.player_matches('Ann') == []
+    assert reloaded.player_matches('Bob') == []  # forgotten
+    assert reloaded.rating_at('Anna', 1005) == 1016
+    assert reloaded.peak('Anna') == history.peak('Anna')
+
+    # A new player reusing a forgotten name starts with a clean history
+    reloaded.record_match('Bob', 'Cy', 1200, 1210, 1000, 990)
+    assert len(reloaded.player_matches('Bob')) == 1
+    assert reloaded.initial[reloaded.ids['bob']] == 1200
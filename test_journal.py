@@ -0,0 +1,112 @@
+# test_journal.py
+# Crash recovery of the Methods journal.  Run with `pytest`.
+
+import os
+
+import Journal
+from Methods import Methods
+
+
+def open_methods(tmp_path, **kwargs):
+    methods = Methods(str(tmp_path / 'player.txt'), journal_filename=str(tmp_path / 'player.journal'), **kwargs)
+    methods.load_file()
+    return methods
+
+
+def ratings(methods):
+    return {player.get_name(): player.get_elo() for player in methods.players.values()}
+
+
+def test_restart_after_crash_replays_the_journal(tmp_path):
+    methods = open_methods(tmp_path)
+    ann = methods.add_player('Ann', 1000)
+    bob = methods.add_player('Bob', 1200)
+    methods.calculate_elo(ann, bob)
+    methods.rename_player(bob, 'Robert')
+    methods.add_player('Cy', 900)
+    methods.delete_player(methods.find_player('Cy'))
+    expected = ratings(methods)
+    # No save_file() or close(): the process dies with only the journal on disk
+
+    restarted = open_methods(tmp_path)
+    assert ratings(restarted) == expected
+    assert not os.path.exists(tmp_path / 'player.txt')
+
+
+def test_restart_after_crash_between_snapshot_and_mark(tmp_path):
+    methods = open_methods(tmp_path)
+    ann = methods.add_player('Ann', 1000)
+    bob = methods.add_player('Bob', 1000)
+    methods.calculate_elo(ann, bob)
+    methods.journal.mark_snapshot = lambda: None  # crash after the snapshot, before the mark
+    methods.save_file()
+    methods.calculate_elo(bob, ann)
+    expected = ratings(methods)
+
+    # The journal is replayed on top of a snapshot that already holds part of it
+    restarted = open_methods(tmp_path)
+    assert ratings(restarted) == expected
+
+
+def test_torn_tail_is_dropped(tmp_path):
+    methods = open_methods(tmp_path)
+    methods.add_player('Ann', 1000)
+    methods.add_player('Bob', 1000)
+    methods.journal.close()
+    journal = str(tmp_path / 'player.journal')
+    intact = os.path.getsize(journal)
+    record = Journal.encode(Journal.ADD, ['Cy'], [900], 0.0)
+    with open(journal, 'ab') as file:
+        file.write(record[:len(record) // 2])  # the crash cut the last write short
+
+    restarted = open_methods(tmp_path)
+    assert ratings(restarted) == {'Ann': 1000, 'Bob': 1000}
+    assert os.path.getsize(journal) == intact
+
+    # Records written after recovery must be readable on the next start
+    restarted.add_player('Dee', 1100)
+    restarted.journal.close()
+    assert ratings(open_methods(tmp_path)) == {'Ann': 1000, 'Bob': 1000, 'Dee': 1100}
+
+
+def test_corrupt_record_ends_the_replay(tmp_path):
+    methods = open_methods(tmp_path)
+    methods.add_player('Ann', 1000)
+    methods.add_player('Bob', 1000)
+    methods.journal.close()
+    journal = str(tmp_path / 'player.journal')
+    with open(journal, 'r+b') as file:
+        file.seek(-1, os.SEEK_END)
+        last = file.read(1)
+        file.seek(-1, os.SEEK_END)
+        file.write(bytes([last[0] ^ 0xFF]))  # Bob's record fails its checksum
+
+    assert ratings(open_methods(tmp_path)) == {'Ann': 1000}
+
+
+def test_journal_without_load_file(tmp_path):
+    methods = open_methods(tmp_path)
+    methods.add_player('Ann', 1000)
+    methods.journal.close()
+
+    # Writing before any replay opens the journal instead of failing
+    methods = Methods(str(tmp_path / 'player.txt'), journal_filename=str(tmp_path / 'player.journal'))
+    assert methods.add_player('Bob', 1100)
+    methods.close()
+
+    assert ratings(open_methods(tmp_path)) == {'Ann': 1000, 'Bob': 1100}
+
+
+def test_snapshot_is_durable_before_the_offset_moves(tmp_path, monkeypatch):
+    methods = open_methods(tmp_path)
+    methods.add_player('Ann', 1000)
+    events = []
+    real_fsync, real_replace = os.fsync, os.replace
+    monkeypatch.setattr(os, 'fsync', lambda fd: events.append('fsync') or real_fsync(fd))
+    monkeypatch.setattr(os, 'replace', lambda src, dst: events.append(os.path.basename(dst)) or real_replace(src, dst))
+    methods.save_file()
+
+    # Every replace follows an fsync of its file, and the roster lands before its offset
+    assert events.index('player.txt') < events.index('player.journal.snap')
+    for target in ('player.txt', 'player.journal.snap'):
+        assert events[events.index(target) - 1] == 'fsync'
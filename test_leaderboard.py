@@ -0,0 +1,75 @@
+# test_leaderboard.py
+# Leaderboard against a plain sorted list.  Run with `pytest`.
+
+import random
+
+import pytest
+
+from Leaderboard import Leaderboard
+from Player import Player
+
+
+def reference(board):
+    """Every player in rank order, rebuilt from scratch."""
+    return [entry[2] for entry in sorted(board.keys.values())]
+
+
+def check(board, players, rng):
+    assert all(-entry[0] == entry[2].get_elo() for entry in board.keys.values())
+    ordered = reference(board)
+    assert len(board) == len(players) == len(ordered)
+    assert [id(player) for player in board.top()] == list(map(id, ordered))
+    assert [id(player) for player in board.top(3)] == list(map(id, ordered[:3]))
+    positions = {id(player): i for i, player in enumerate(ordered)}
+    for player in rng.sample(players, min(10, len(players))):
+        assert board.rank(player) == positions[id(player)] + 1
+    for _ in range(5):
+        start, count = rng.randrange(len(ordered) + 3), rng.randrange(12)
+        assert list(map(id, board.slice(start, count))) == list(map(id, ordered[start:start + count]))
+    assert list(map(id, board.page(1, 4))) == list(map(id, ordered[4:8]))
+    assert board._offset(len(board.lists)) == len(ordered)  # the tree counts every entry once
+
+
+@pytest.mark.parametrize('load', [1, 2, 3, 4, 5])
+def test_matches_sorted_reference(load):
+    rng = random.Random(load)
+    board = Leaderboard()
+    board.load = load  # tiny sublists so splits and empty sublists happen all the time
+    players = [Player(f"P{i}", rng.randrange(1000, 1100)) for i in range(60)]
+    board.add_many(players[:30])
+    for player in players[30:]:
+        board.add(player)
+    check(board, players, rng)
+
+    for step in range(600):
+        action = rng.random()
+        if action < 0.25 and players:
+            player = players.pop(rng.randrange(len(players)))
+            board.remove(player)
+        elif action < 0.5:
+            player = Player(f"N{step}", rng.randrange(1000, 1100))
+            players.append(player)
+            board.add(player)
+        elif players:
+            board.set_elo(rng.choice(players), rng.randrange(1000, 1100))
+        if players:
+            check(board, players, rng)
+
+
+def test_ties_keep_insertion_order():
+    board = Leaderboard()
+    board.load = 1
+    players = [Player(f"P{i}", 1000) for i in range(10)]
+    for player in players:
+        board.add(player)
+    assert [board.rank(player) for player in players] == list(range(1, 11))
+    assert board.slice(8, 5) == players[8:]
+
+
+def test_empty_and_drained():
+    board = Leaderboard()
+    assert board.top() == [] and board.slice(0, 10) == []
+    ann = Player("Ann", 1000)
+    board.add(ann)
+    board.remove(ann)
+    assert len(board) == 0 and board.slice(0, 10) == [] and board.page(0) == []
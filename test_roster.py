@@ -0,0 +1,103 @@
+# test_roster.py
+# Methods over a Roster file against Methods over player.txt.  Run with `pytest`.
+
+import random
+
+import pytest
+
+import Roster
+from Methods import Methods
+from Player import Player
+
+
+def ratings(methods):
+    return {player.get_name(): player.get_elo() for player in methods.players.values()}
+
+
+def check(methods, reference, rng):
+    assert ratings(methods) == ratings(reference)
+    board = methods.leaderboard
+    ordered = board.top()
+    assert len(board) == len(methods.players) == len(ordered)
+    assert sorted(map(id, ordered)) == sorted(id(player) for player in methods.players.values())
+    elos = [player.get_elo() for player in ordered]
+    assert elos == sorted(elos, reverse=True)
+    for player in rng.sample(ordered, min(10, len(ordered))):
+        assert board.rank(player) == ordered.index(player) + 1
+        assert methods.find_player(player.get_name().upper()) is player
+    for _ in range(5):
+        start, count = rng.randrange(len(ordered) + 3), rng.randrange(12)
+        assert board.slice(start, count) == ordered[start:start + count]
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_matches_text_roster(tmp_path, seed):
+    rng = random.Random(seed)
+    players = [Player(f"P{i}", rng.randrange(1000, 1050)) for i in range(80)]
+    Roster.write(str(tmp_path / 'player.elo'), players)
+    with open(tmp_path / 'player.txt', 'w', encoding='utf-8') as file:
+        file.writelines(f"{player.get_name()};{player.get_elo()}\n" for player in players)
+    methods = Methods(str(tmp_path / 'player.elo'), journal_filename=str(tmp_path / 'elo.journal'))
+    reference = Methods(str(tmp_path / 'player.txt'))
+    methods.load_file()
+    reference.load_file()
+    check(methods, reference, rng)
+
+    for step in range(400):
+        names = [player.get_name() for player in reference.players.values()]
+        action = rng.random()
+        if action < 0.1 and names:
+            name = rng.choice(names)
+            methods.delete_player(methods.find_player(name))
+            reference.delete_player(reference.find_player(name))
+        elif action < 0.2:
+            name, rating = rng.choice([f"N{step}", f"p{rng.randrange(80)}"]), rng.randrange(1000, 1050)
+            assert (methods.add_player(name, rating) is None) == (reference.add_player(name, rating) is None)
+        elif action < 0.3 and names:
+            name, new_name = rng.choice(names), rng.choice([f"R{step}", rng.choice(names).upper()])
+            assert methods.rename_player(methods.find_player(name), new_name) == \
+                reference.rename_player(reference.find_player(name), new_name)
+        elif action < 0.35:
+            methods.save_file()
+        elif len(names) > 1:
+            winner, loser = rng.sample(names, 2)
+            methods.calculate_elo(methods.find_player(winner), methods.find_player(loser))
+            reference.calculate_elo(reference.find_player(winner), reference.find_player(loser))
+        if step % 40 == 0:
+            check(methods, reference, rng)
+    check(methods, reference, rng)
+
+    # The journal brings a restart back to the same roster
+    methods.journal.close()
+    restarted = Methods(str(tmp_path / 'player.elo'), journal_filename=str(tmp_path / 'elo.journal'))
+    restarted.load_file()
+    check(restarted, reference, rng)
+    restarted.save_file()
+    restarted.close()
+    reloaded = Methods(str(tmp_path / 'player.elo'))
+    reloaded.load_file()
+    check(reloaded, reference, rng)
+
+
+def test_lookup_and_search(tmp_path):
+    filename = str(tmp_path / 'player.elo')
+    Roster.write(filename, [Player(name, rating) for name, rating in
+                            [("Bob", 1100), ("ann", 1000), ("Anna", 1200), ("ANN", 900), ("Cy", 1000)]])
+    players = Roster.Players(Roster.Store(filename))
+    assert len(players) == 4  # "ANN" repeats "ann"; the first one is kept
+    assert players['ann'].get_elo() == 1000 and players.get('a') is None
+    assert not players.loaded.keys() - {players.store.find('ann')}  # only the row asked for was made
+
+    players['anna'].set_elo(800)
+    found, total = players.search('an', 10)
+    assert [player.get_name() for player in found] == ["ann", "Anna"] and total == 2
+    del players['ann']
+    assert players.search('an', 10)[1] == 1 and 'ann' not in players
+    players.store.close()
+
+
+def test_old_version_is_refused(tmp_path):
+    filename = tmp_path / 'player.elo'
+    filename.write_bytes(Roster.HEADER.pack(b'ELOROST1', 0, 0))
+    with pytest.raises(ValueError):
+        Methods(str(filename)).load_file()